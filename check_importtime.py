@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Import-time budget of the pykits packages, measured with 'python -X importtime' in a fresh interpreter.
+
+    python check_importtime.py                  # check the default budgets
+    python check_importtime.py -b logger=20     # override a budget (ms)
+
+Exits with 1 if any import goes over its budget, so it can be used in CI.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 毫秒，包本身的导入（公开接口都是延迟导入的），不含解释器启动。
+# 实测（5次取最好）：runconfig 6-9ms（configurable.py不导入typing）；colored_logger 29-36ms。
+# json/orjson（orjson连带导入uuid/zoneinfo/enum，约20ms）在第一次编码时才导入，不计入这里，
+# 某个模块又在顶层导入它们时会超出预算
+BUDGETS = {
+    'clients': 10,
+    'configurable': 10,
+    'configurable.runconfig': 20,
+    'logger': 10,
+    'logger.colored_logger': 50,
+    'tmstat': 10,
+    'genqr': 10,
+}
+
+
+def measure(module: str, repeat: int = 5) -> float:
+    """
+    Measure the cumulative import time of a module in a fresh interpreter, the best of several runs.
+
+    :param module: the module to import
+    :param repeat: count of runs
+    :return: the import time in ms
+    """
+    # 追加到sys.path末尾而不是放在最前面，避免numbers/crypt等目录遮蔽同名的标准库
+    code = f'import sys; sys.path.append({ROOT!r}); import {module}'
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=os.path.dirname(ROOT), capture_output=True, text=True, check=True)
+        total = 0
+        for line in proc.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].strip() == module:
+                total = int(parts[1].strip())
+        ms = total / 1000
+        best = ms if best is None else min(best, ms)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the import time of the packages against a budget')
+    parser.add_argument(
+        '-b', '--budget', action='append', default=[],
+        help='module=ms, override or add a budget, can be given more than once')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='runs per module, the best one is used')
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        module, _, ms = item.partition('=')
+        budgets[module] = float(ms)
+
+    failed = []
+    for module, budget in budgets.items():
+        ms = measure(module, args.repeat)
+        status = 'OK' if ms <= budget else 'OVER'
+        print(f'{status:>4} {module:<28} {ms:8.2f} ms (budget {budget} ms)')
+        if ms > budget:
+            failed.append(module)
+    if failed:
+        print(f'Import time over budget: {", ".join(failed)}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""
+Client pools rotating over several endpoints.
+"""
+import importlib
+
+_LAZY = {
+    'AsyncRotatingClientPool': '.async_rotating_pool',
+    'LoopAwareClientPool': '.loop_pool',
+    'RotatingClientPool': '.rotating_pool',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    return value
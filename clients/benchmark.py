@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Offline benchmark of the client pools under contention.
+
+A FakeClient simulates the remote side with configurable latency, jitter and error rate,
+so the pools can be measured without any network access:
+
+    python -m clients.benchmark --pool all --callers 2000 --duration 5
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+from .async_rotating_pool import AsyncRotatingClientPool
+from .loop_pool import LoopAwareClientPool
+from .rotating_pool import RotatingClientPool
+
+
+class FakeClientError(Exception):
+    """Simulated failure of a FakeClient call"""
+
+
+class FakeClient:
+    """
+    A local client that sleeps instead of doing IO.
+    Configure the class attributes (or use FakeClient.configure) before building a pool.
+    """
+    latency: float = 0.001
+    """mean latency of a call in seconds"""
+    jitter: float = 0.0005
+    """max deviation from the latency, uniformly distributed"""
+    error_rate: float = 0.0
+    """probability of a call raising FakeClientError"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.calls = 0
+
+    @classmethod
+    def configure(cls, latency: float, jitter: float, error_rate: float):
+        cls.latency = latency
+        cls.jitter = jitter
+        cls.error_rate = error_rate
+
+    def _delay(self) -> float:
+        self.calls += 1
+        if random.random() < self.error_rate:
+            raise FakeClientError(f'simulated error on {self.endpoint}')
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def call(self):
+        time.sleep(self._delay())
+
+    async def acall(self):
+        await asyncio.sleep(self._delay())
+
+
+class Stats:
+    """Collects acquire latencies, per-caller counts and errors"""
+
+    def __init__(self, callers: int):
+        self.latencies = []
+        self.counts = [0] * callers
+        self.errors = 0
+
+    def add(self, caller: int, latency: float, ok: bool):
+        # list.append and int += on distinct slots are safe enough for a benchmark under GIL
+        self.latencies.append(latency)
+        self.counts[caller] += 1
+        if not ok:
+            self.errors += 1
+
+    def report(self, name: str, elapsed: float) -> dict:
+        total = len(self.latencies)
+        lat = sorted(self.latencies) or [0.0]
+        counts = self.counts
+        # Jain's fairness index: 1.0 means every caller got the same share
+        square_sum = sum(c * c for c in counts)
+        fairness = sum(counts) ** 2 / (len(counts) * square_sum) if square_sum else 0.0
+        mean = sum(counts) / len(counts) if counts else 0.0
+        stdev = (square_sum / len(counts) - mean * mean) ** 0.5 if counts else 0.0
+        result = {
+            'pool': name,
+            'calls': total,
+            'errors': self.errors,
+            'throughput': total / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': lat[int(0.50 * (len(lat) - 1))] * 1000,
+            'p99_ms': lat[int(0.99 * (len(lat) - 1))] * 1000,
+            'fairness': fairness,
+            'min_calls': min(counts) if counts else 0,
+            'stdev_calls': stdev,
+        }
+        return result
+
+
+def bench_sync(endpoints: list[str], conn_per_url: int, callers: int, duration: float) -> dict:
+    pool = RotatingClientPool(FakeClient, endpoints, conn_per_url)
+    stats = Stats(callers)
+    stop = threading.Event()
+
+    def worker(idx: int):
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            with pool.get_client() as client:
+                acquired = time.perf_counter() - t0
+                try:
+                    client.call()
+                    ok = True
+                except FakeClientError:
+                    ok = False
+            stats.add(idx, acquired, ok)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(callers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return stats.report('sync', time.perf_counter() - start)
+
+
+async def _async_workers(pool, stats: Stats, first: int, callers: int, deadline: float):
+    async def worker(idx: int):
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            async with pool.get_client() as client:
+                acquired = time.perf_counter() - t0
+                try:
+                    await client.acall()
+                    ok = True
+                except FakeClientError:
+                    ok = False
+            stats.add(idx, acquired, ok)
+
+    await asyncio.gather(*(worker(i) for i in range(first, first + callers)))
+
+
+def bench_async(endpoints: list[str], conn_per_url: int, callers: int, duration: float) -> dict:
+    pool = AsyncRotatingClientPool(FakeClient, endpoints, conn_per_url)
+    stats = Stats(callers)
+    start = time.perf_counter()
+    asyncio.run(_async_workers(pool, stats, 0, callers, start + duration))
+    return stats.report('async', time.perf_counter() - start)
+
+
+def bench_loops(
+        endpoints: list[str], conn_per_url: int, callers: int, duration: float,
+        loops: int = 4, max_in_use: int | None = None) -> dict:
+    pool = LoopAwareClientPool(FakeClient, endpoints, conn_per_url, max_in_use=max_in_use)
+    stats = Stats(callers)
+    per_loop = [callers // loops + (1 if i < callers % loops else 0) for i in range(loops)]
+    start = time.perf_counter()
+    deadline = start + duration
+    threads, first = [], 0
+    for n in per_loop:
+        coro = _async_workers(pool, stats, first, n, deadline)
+        threads.append(threading.Thread(target=asyncio.run, args=(coro,)))
+        first += n
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return stats.report(f'loops({loops})', time.perf_counter() - start)
+
+
+def print_report(result: dict):
+    print(f"{result['pool']:>10}: {result['calls']:>8} calls, {result['errors']:>6} errors, "
+          f"{result['throughput']:>10.1f} calls/s, "
+          f"acquire p50 {result['p50_ms']:.3f}ms p99 {result['p99_ms']:.3f}ms, "
+          f"fairness {result['fairness']:.4f} (min {result['min_calls']}, stdev {result['stdev_calls']:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the client pools with a fake client, fully offline')
+    parser.add_argument('--pool', choices=['sync', 'async', 'loops', 'all'], default='all')
+    parser.add_argument('--callers', type=int, default=1000, help='concurrent callers (threads or tasks)')
+    parser.add_argument('--endpoints', type=int, default=4, help='count of fake endpoints')
+    parser.add_argument('--conn-per-url', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds to run each pool')
+    parser.add_argument('--latency', type=float, default=0.001, help='mean fake call latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0005, help='max latency deviation in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability of a fake call failing')
+    parser.add_argument('--loops', type=int, default=4, help='event loops (threads) for the loops pool')
+    parser.add_argument('--max-in-use', type=int, default=None, help='global limit for the loops pool')
+    args = parser.parse_args()
+
+    FakeClient.configure(args.latency, args.jitter, args.error_rate)
+    endpoints = [f'fake://{i}' for i in range(args.endpoints)]
+    if args.pool in ('sync', 'all'):
+        print_report(bench_sync(endpoints, args.conn_per_url, args.callers, args.duration))
+    if args.pool in ('async', 'all'):
+        print_report(bench_async(endpoints, args.conn_per_url, args.callers, args.duration))
+    if args.pool in ('loops', 'all'):
+        print_report(bench_loops(
+            endpoints, args.conn_per_url, args.callers, args.duration,
+            loops=args.loops, max_in_use=args.max_in_use))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class _GlobalLimiter:
+    """
+    A FIFO semaphore shared by several event loops.
+    Waiters are woken up in their own loop through call_soon_threadsafe.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self.lock = threading.Lock()
+        self.waiters = deque()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if self.in_use < self.limit and not self.waiters:
+                self.in_use += 1
+                return
+            waiter = (loop, loop.create_future())
+            self.waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self.lock:
+                try:
+                    self.waiters.remove(waiter)
+                    removed = True
+                except ValueError:
+                    removed = False
+            if not removed and waiter[1].done() and not waiter[1].cancelled():
+                # _wakeup已经把名额交给了这个waiter，但任务在恢复前被取消，归还名额
+                self.release()
+            # 其它情况：名额移交后future被取消，由_wakeup负责交给下一个
+            raise
+
+    def release(self):
+        with self.lock:
+            while self.waiters:
+                loop, fut = self.waiters.popleft()
+                try:
+                    # 名额直接移交给等待者，in_use保持不变
+                    loop.call_soon_threadsafe(self._wakeup, fut)
+                    return
+                except RuntimeError:
+                    # loop已经关闭，跳过该等待者
+                    continue
+            self.in_use -= 1
+
+    def _wakeup(self, fut: asyncio.Future):
+        if fut.done():
+            # 等待者在移交前被取消，把名额交给下一个
+            self.release()
+        else:
+            fut.set_result(None)
+
+
+class _LoopSubPool:
+    """Clients bound to a single event loop"""
+
+    def __init__(self, client_cls: type, endpoints: list[str]):
+        self.clients = [{'client': client_cls(endpoint), 'in_use': False} for endpoint in endpoints]
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.condition:
+            while True:
+                for client_info in self.clients:
+                    if not client_info['in_use']:
+                        client_info['in_use'] = True
+                        return client_info['client']
+                await self.condition.wait()
+
+    async def release(self, client):
+        async with self.condition:
+            for client_info in self.clients:
+                if client_info['client'] is client:
+                    client_info['in_use'] = False
+                    break
+            self.condition.notify()
+
+
+class LoopAwareClientPool:
+    """
+    Wraps a client class and provides a pool of clients which can be shared across event loops and processes.
+    Each event loop gets its own sub-pool of clients, and the total count of clients in use is bounded by
+    max_in_use across all the loops.
+    After fork() the child process drops the inherited clients and builds new ones lazily.
+    """
+
+    def __init__(
+            self, client_cls: type, endpoints: list[str] | str,
+            conn_per_url: int = 1, max_in_use: int | None = None):
+        """
+        :param client_cls: the client class to wrap
+        :param endpoints: list of URLs to connect to for the clients
+        :param conn_per_url: count of connections per each endpoint, in each event loop
+        :param max_in_use: global limit of clients in use over all event loops, None for no limit
+        """
+        if isinstance(endpoints, str):
+            endpoints = [endpoints]
+        self.client_cls = client_cls
+        self.endpoints = endpoints * conn_per_url
+        self.max_in_use = max_in_use
+        self._reset()
+        _live_pools.add(self)
+
+    def _reset(self):
+        """(Re)build the per-process state, called on init and after fork"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._sub_pools = weakref.WeakKeyDictionary()
+        self._limiter = _GlobalLimiter(self.max_in_use) if self.max_in_use else None
+
+    def _get_sub_pool(self) -> _LoopSubPool:
+        if self._pid != os.getpid():
+            # fork钩子不可用时的兜底检查
+            self._reset()
+        loop = asyncio.get_running_loop()
+        sub_pool = self._sub_pools.get(loop)
+        if sub_pool is None:
+            with self._lock:
+                sub_pool = self._sub_pools.get(loop)
+                if sub_pool is None:
+                    sub_pool = _LoopSubPool(self.client_cls, self.endpoints)
+                    self._sub_pools[loop] = sub_pool
+        return sub_pool
+
+    @asynccontextmanager
+    async def get_client(self):
+        sub_pool = self._get_sub_pool()
+        limiter = self._limiter
+        if limiter:
+            await limiter.acquire()
+        try:
+            client = await sub_pool.acquire()
+            try:
+                yield client
+            finally:
+                await sub_pool.release(client)
+        finally:
+            if limiter:
+                limiter.release()
+
+
+_live_pools = weakref.WeakSet()
+
+
+def _reset_pools_after_fork():
+    for pool in list(_live_pools):
+        pool._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
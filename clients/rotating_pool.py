@@ -1,3 +1,4 @@
+import os
 import threading
 from contextlib import contextmanager
 
@@ -6,6 +7,7 @@ class RotatingClientPool:
     """
     Wraps a client class and provides a pool of clients to use.
     each client uses different endpoint.
+    The clients are rebuilt in the child process after fork(), so connections are never shared with the parent.
     """
 
     def __init__(self, client_cls: type, endpoints: list[str] | str, conn_per_url: int = 1):
@@ -17,9 +19,16 @@ class RotatingClientPool:
         """
         if isinstance(endpoints, str):
             endpoints = [endpoints]
+        self.client_cls = client_cls
+        self.endpoints = endpoints * conn_per_url
+        self._reset()
+
+    def _reset(self):
+        """(Re)build the clients for the current process"""
+        self._pid = os.getpid()
         self.clients = [
-            {'client': client_cls(endpoint), 'in_use': False}
-            for endpoint in endpoints * conn_per_url]
+            {'client': self.client_cls(endpoint), 'in_use': False}
+            for endpoint in self.endpoints]
         self.condition = threading.Condition()
 
     @contextmanager
@@ -32,6 +41,9 @@ class RotatingClientPool:
                 self._release_client(client)
 
     def _acquire_client(self):
+        if self._pid != os.getpid():
+            # fork后的子进程，丢弃从父进程继承的连接
+            self._reset()
         with self.condition:
             while True:
                 for client_info in self.clients:
@@ -0,0 +1,22 @@
+"""
+Configurable objects with pydantic based configs.
+"""
+import importlib
+
+_LAZY = {
+    'BaseConfig': '.baseconf',
+    'Configurable': '.configurable',
+    'ConfigFileWatcher': '.reloadable',
+    'ReloadableConfigurable': '.reloadable',
+    'Runnable': '.runnable',
+    'RunnableConfigurable': '.runconfig',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    return value
@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 # coding=utf-8
 
-from typing import Any
+import math
+from typing import Annotated, Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, BeforeValidator, ConfigDict, PydanticUserError, TypeAdapter, ValidationError
+from typing_extensions import TypedDict
 
 
 # TYPENAMES = {
@@ -18,6 +20,40 @@ from pydantic import BaseModel
 # }
 
 
+_CONVERTERS: dict[type, dict[str, TypeAdapter]] = {}
+"""每个BaseConfig子类的字段转换器缓存"""
+_BULK_VALIDATORS: dict[type, TypeAdapter] = {}
+"""每个BaseConfig子类的批量校验器缓存"""
+_SCHEMA_PROPERTIES: dict[type, dict[str, dict]] = {}
+"""每个BaseConfig子类的json schema properties缓存"""
+
+
+def _truncate_float(value: Any) -> Any:
+    """和之前直接调用int(value)的行为保持一致，int字段的3.7截断为3，而不是校验失败后重置为默认值"""
+    if isinstance(value, float) and math.isfinite(value):
+        return int(value)
+    return value
+
+
+def _field_type(field_info) -> Any:
+    """字段的类型，带上Field中的约束（如gt/max_length）"""
+    annotation = field_info.annotation
+    if annotation is int:
+        annotation = Annotated[int, BeforeValidator(_truncate_float)]
+    if field_info.metadata:
+        return Annotated[(annotation, *field_info.metadata)]
+    return annotation
+
+
+def _type_adapter(tp: Any) -> TypeAdapter:
+    # 数字允许转为字符串，和之前直接调用str(value)的行为保持一致
+    try:
+        return TypeAdapter(tp, config=ConfigDict(coerce_numbers_to_str=True))
+    except PydanticUserError:
+        # BaseModel/TypedDict等类型不能再指定config
+        return TypeAdapter(tp)
+
+
 class BaseConfig(BaseModel):
     """
     可配置参数基类，基于pydantic的BaseModel
@@ -44,24 +80,100 @@ class BaseConfig(BaseModel):
         :raises: TypeError if set failed and allow_default is False; ValueError if attribute not found
         """
         # 检查属性是否存在
-        if attr_name not in self.model_fields:
+        converters = _CONVERTERS.get(type(self)) or self.converters()
+        converter = converters.get(attr_name)
+        if converter is None:
             raise ValueError(f"Attribute {attr_name} not found")
 
-        # 获取该属性的类型
-        field_info = self.model_fields[attr_name]
         # 尝试将值转换为相应的类型
         try:
-            # 尝试使用类型直接转换值
-            valid_value = field_info.annotation(attr_value)
-            setattr(self, attr_name, valid_value)
+            valid_value = converter.validate_python(attr_value)
+            self._assign(attr_name, valid_value)
             return True
-        except (TypeError, ValueError) as e:  # 捕获常见的类型转换错误
+        except (TypeError, ValueError) as e:  # 捕获常见的类型转换错误，ValidationError也是ValueError
+            field_info = type(self).model_fields[attr_name]
             if allow_default and not field_info.is_required():
-                setattr(self, attr_name, field_info.default)
+                setattr(self, attr_name, field_info.get_default(call_default_factory=True))
                 return False
             else:
                 raise TypeError(f"Failed to convert {attr_value} to {field_info.annotation}: {e}")
 
+    def set_many(self, values: dict[str, Any], allow_default: bool = True) -> dict[str, bool]:
+        """
+        批量设置属性值，一次性校验全部的值，全部校验通过（或使用默认值）后才统一写入
+        :param values: 属性名到属性值的dict
+        :param allow_default: 是否在设置失败的时候使用默认值
+        :return: 每个属性是否设置成功，False表示使用了默认值
+        :raises: TypeError if any value failed and allow_default is False, nothing is set in this case;
+            ValueError if any attribute not found
+        """
+        fields = type(self).model_fields
+        for attr_name in values:
+            if attr_name not in fields:
+                raise ValueError(f"Attribute {attr_name} not found")
+        try:
+            validated = self.bulk_validator().validate_python(values)
+            failed = {}
+        except ValidationError as e:
+            failed = {err['loc'][0]: err['msg'] for err in e.errors() if err['loc']}
+            validated = {k: v for k, v in values.items() if k not in failed}
+            if validated:
+                validated = self.bulk_validator().validate_python(validated)
+        result = {k: True for k in validated}
+        for attr_name, msg in failed.items():
+            field_info = fields[attr_name]
+            if allow_default and not field_info.is_required():
+                validated[attr_name] = field_info.get_default(call_default_factory=True)
+                result[attr_name] = False
+            else:
+                raise TypeError(f"Failed to convert {values[attr_name]} to {field_info.annotation}: {msg}")
+        config = type(self).model_config
+        if config.get('validate_assignment') or config.get('frozen'):
+            for attr_name, value in validated.items():
+                setattr(self, attr_name, value)
+        else:
+            # 一次性写入，其它线程不会看到只更新了一部分的配置
+            self.__dict__.update(validated)
+            self.__pydantic_fields_set__.update(validated)
+        return result
+
+    def _assign(self, attr_name: str, value: Any):
+        """写入已经校验过的值，不需要再次校验时跳过BaseModel.__setattr__"""
+        config = type(self).model_config
+        if config.get('validate_assignment') or config.get('frozen'):
+            setattr(self, attr_name, value)
+        else:
+            self.__dict__[attr_name] = value
+            self.__pydantic_fields_set__.add(attr_name)
+
+    @classmethod
+    def converters(cls) -> dict[str, TypeAdapter]:
+        """
+        每个字段的转换器，按类缓存，只在第一次调用时构建
+        :return: 字段名到TypeAdapter的dict
+        """
+        converters = _CONVERTERS.get(cls)
+        if converters is None:
+            converters = {name: _type_adapter(_field_type(f)) for name, f in cls.model_fields.items()}
+            _CONVERTERS[cls] = converters
+        return converters
+
+    @classmethod
+    def bulk_validator(cls) -> TypeAdapter:
+        """
+        校验部分字段组成的dict的校验器（所有字段都可选的TypedDict），按类缓存
+        :return: TypeAdapter
+        """
+        validator = _BULK_VALIDATORS.get(cls)
+        if validator is None:
+            fields = {name: _field_type(f) for name, f in cls.model_fields.items()}
+            typed_dict = TypedDict(f'{cls.__name__}Update', fields, total=False)
+            # TypedDict不能在TypeAdapter上指定config，和单个字段的转换器一样允许数字转为字符串
+            typed_dict.__pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
+            validator = _type_adapter(typed_dict)
+            _BULK_VALIDATORS[cls] = validator
+        return validator
+
     def get(self, attr_name: str) -> Any:
         """
         获取属性值
@@ -83,7 +195,18 @@ class BaseConfig(BaseModel):
         dct = super().model_dump(*args, **kwargs)
         if not with_schema:
             return dct
-        pdict = self.model_json_schema()['properties']
-        for key, props in pdict.items():
-            props['value'] = dct[key]
-        return pdict
+        # schema按类只生成一次，每次dump只浅拷贝每个字段的属性并填入当前值
+        return {key: {**props, 'value': dct[key]} for key, props in self.schema_properties().items() if key in dct}
+
+    @classmethod
+    def schema_properties(cls) -> dict[str, dict]:
+        """
+        json schema中的properties，按类缓存，只在第一次调用时生成
+        注意返回的是缓存本身，不要修改
+        :return: 字段名到schema属性的dict
+        """
+        properties = _SCHEMA_PROPERTIES.get(cls)
+        if properties is None:
+            properties = cls.model_json_schema()['properties']
+            _SCHEMA_PROPERTIES[cls] = properties
+        return properties
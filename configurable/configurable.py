@@ -1,11 +1,37 @@
 #!/usr/bin/env python
 # coding=utf-8
 
-import json
+from __future__ import annotations
+
 from abc import ABC
-from typing import Any
+from collections.abc import Callable, Iterable
+
+# 不导入typing（import configurable.runconfig的大部分时间花在typing上），类型检查器同样识别这个常量
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+    # 只用于类型标注，运行时不导入pydantic，Runnable/graph等不需要pydantic
+    from .baseconf import BaseConfig
 
-from .baseconf import BaseConfig
+_dumps_impl: Callable[[Any], bytes] | None = None
+
+
+def _dumps() -> Callable[[Any], bytes]:
+    """
+    编码为utf-8 json bytes的函数，第一次调用时选择orjson（可选）或者json并缓存
+    orjson会连带导入uuid/zoneinfo等模块，放在这里而不是模块顶层，import configurable时不需要付出这部分时间
+    """
+    global _dumps_impl
+    if _dumps_impl is None:
+        try:
+            import orjson
+            _dumps_impl = lambda obj: orjson.dumps(obj, default=str)  # noqa: E731
+        except ImportError:  # optional, the json module is used if not installed
+            import json
+            encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+            _dumps_impl = lambda obj: encoder.encode(obj).encode('utf-8')  # noqa: E731
+    return _dumps_impl
 
 
 class Configurable(ABC):
@@ -17,7 +43,7 @@ class Configurable(ABC):
     name: str = 'Configurable',
     description: str = 'Configurable抽象类'
 
-    configs: BaseConfig = None
+    configs: 'BaseConfig' = None
     """可配置参数列表"""
 
     def set(self, key: str, value: Any, allow_default: bool = True):
@@ -80,8 +106,21 @@ class Configurable(ABC):
             allow_nan: bool = True, indent: int | str | None = None,
             separators: tuple[str, str] | None = None) -> str:
         """dump to json"""
+        import json
         return json.dumps(
             self.dump(with_schema=with_schema),
             skipkeys=skip_keys, ensure_ascii=ensure_ascii,
             indent=indent, check_circular=check_circular,
             sort_keys=sort_keys, allow_nan=allow_nan, separators=separators)
+
+    @staticmethod
+    def dumps_many(items: Iterable['Configurable'], with_schema: bool = True) -> bytes:
+        """
+        批量dump为json数组，直接输出utf-8编码的bytes，适合一次性返回大量可配置对象
+        安装了orjson时使用orjson编码
+        :param items: 可配置对象列表
+        :param with_schema: 是否包含schema信息
+        :return: json bytes
+        """
+        objs = [item.dump(with_schema=with_schema) for item in items]
+        return _dumps()(objs)
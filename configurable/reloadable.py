@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import json
+import os
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+from .configurable import Configurable
+
+if TYPE_CHECKING:
+    from .baseconf import BaseConfig
+
+
+def read_config_file(path: str) -> dict:
+    """
+    读取json或yaml配置文件（按后缀判断，yaml需要安装PyYAML）
+    :param path:
+    :return:
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+class ConfigFileWatcher:
+    """
+    轮询方式监控配置文件，文件的mtime或大小变化时读取并回调
+    """
+
+    def __init__(self, path: str, callback: Callable[[dict], None], interval: float = 1.0):
+        """
+        :param path: json/yaml配置文件
+        :param callback: 文件变化时的回调，参数为读取到的dict
+        :param interval: 轮询间隔（秒）
+        """
+        self.path = path
+        self.callback = callback
+        self.interval = interval
+        self.last_error: Exception | None = None
+        self._signature = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ConfigFileWatcher', daemon=True)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def check(self) -> bool:
+        """
+        检查一次文件是否变化，变化则回调
+        :return: 是否发生了回调
+        """
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        self.callback(read_config_file(self.path))
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+                self.last_error = None
+            except Exception as e:  # 文件写了一半或者校验失败，保留旧配置，等下次变化
+                self.last_error = e
+                print(f'Failed to reload {self.path}: {e}', file=sys.stderr)
+
+    def start(self) -> 'ConfigFileWatcher':
+        self.check()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+def config_values(configs: dict) -> dict:
+    """
+    dump(with_schema=True)的configs是{key: {schema属性..., 'value': 值}}，取出其中的值；不带schema的dict原样返回
+    :param configs:
+    :return: key到值的dict
+    """
+    return {
+        key: value['value'] if isinstance(value, dict) and 'value' in value and 'title' in value else value
+        for key, value in configs.items()}
+
+
+class ConfigView:
+    """
+    配置快照的只读视图，读取属性和调用方法都转发给快照，修改属性或者调用set/set_many会抛出TypeError
+    """
+    __slots__ = ('_config',)
+
+    _WRITERS = frozenset({'set', 'set_many', '_assign'})
+
+    def __init__(self, config: 'BaseConfig'):
+        object.__setattr__(self, '_config', config)
+
+    def __getattr__(self, name: str):
+        if name in self._WRITERS:
+            raise TypeError(f'Config snapshot is read-only, use ReloadableConfigurable.{name.lstrip("_")} instead')
+        return getattr(self._config, name)
+
+    def __setattr__(self, name: str, value: Any):
+        raise TypeError('Config snapshot is read-only, use ReloadableConfigurable.set/update instead')
+
+    def __delattr__(self, name: str):
+        raise TypeError('Config snapshot is read-only')
+
+    def __eq__(self, other):
+        if isinstance(other, ConfigView):
+            other = other._config
+        return self._config == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._config)
+
+
+class ReloadableConfigurable(Configurable):
+    """
+    可热更新的Configurable，configs是不可变的快照
+    每次更新（set/load/文件变化）都会复制出新的快照，校验通过后整体替换，读取方不需要加锁，也不会看到更新了一半的配置
+    订阅者只会收到实际发生变化的key
+    """
+
+    _snapshot: 'BaseConfig' = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 子类用类属性 configs = C() 声明默认配置时，会覆盖configs属性，转存为默认快照
+        configs = cls.__dict__.get('configs')
+        if configs is not None and not isinstance(configs, property):
+            delattr(cls, 'configs')
+            cls._snapshot = configs.model_copy(deep=True)
+
+    @property
+    def configs(self) -> ConfigView:
+        """当前配置快照的只读视图，修改请用set/update"""
+        return ConfigView(self._snapshot)
+
+    @configs.setter
+    def configs(self, configs: 'BaseConfig'):
+        if isinstance(configs, ConfigView):
+            configs = configs._config
+        with self._writer_lock():
+            # 复制一份，调用方手里的对象之后再修改也不会影响快照
+            self._publish(configs.model_copy(deep=True))
+
+    def _writer_lock(self) -> threading.RLock:
+        # 可重入，订阅者的回调里也可以再更新配置
+        lock = self.__dict__.get('_lock')
+        if lock is None:
+            lock = self.__dict__.setdefault('_lock', threading.RLock())
+        return lock
+
+    def _publish(self, snapshot: 'BaseConfig'):
+        """替换快照并通知订阅者，调用方需要持有写锁"""
+        old = self._snapshot
+        self._snapshot = snapshot
+        if old is None:
+            return
+        changed = {
+            key: getattr(snapshot, key) for key in type(snapshot).model_fields
+            if getattr(snapshot, key) != getattr(old, key)}
+        if changed:
+            self._notify(changed)
+
+    def _notify(self, changed: dict[str, Any]):
+        for callback, keys in list(self.__dict__.get('_subscribers', [])):
+            if keys is None:
+                callback(changed)
+                continue
+            sub = {k: v for k, v in changed.items() if k in keys}
+            if sub:
+                callback(sub)
+
+    def subscribe(self, callback: Callable[[dict[str, Any]], None], keys: Iterable[str] | None = None):
+        """
+        订阅配置变化
+        :param callback: 回调，参数为发生变化的key和新值
+        :param keys: 只关心的key，None表示全部
+        :return:
+        """
+        subscribers = self.__dict__.setdefault('_subscribers', [])
+        subscribers.append((callback, frozenset(keys) if keys is not None else None))
+
+    def unsubscribe(self, callback: Callable[[dict[str, Any]], None]):
+        subscribers = self.__dict__.get('_subscribers', [])
+        self.__dict__['_subscribers'] = [s for s in subscribers if s[0] is not callback]
+
+    def get(self, key: str, default: Any = None):
+        """
+        无锁读取当前快照中的配置
+        :param key:
+        :param default:
+        :return:
+        """
+        snapshot = self._snapshot
+        if key not in type(snapshot).model_fields:
+            return default
+        return getattr(snapshot, key)
+
+    def update(self, values: dict[str, Any], allow_default: bool = False) -> dict[str, bool]:
+        """
+        只取和当前快照不同的值，校验后整体替换快照
+        :param values: key到新值的dict
+        :param allow_default: 类型不匹配的时候是否设置为默认值，False时任何一个值校验失败都不做修改
+        :return: 每个变化的key是否设置成功，参考BaseConfig.set_many
+        :raises: TypeError/ValueError, see BaseConfig.set_many
+        """
+        with self._writer_lock():
+            current = self._snapshot
+            fields = type(current).model_fields
+            diff = {k: v for k, v in values.items() if k not in fields or getattr(current, k) != v}
+            if not diff:
+                return {}
+            snapshot = current.model_copy()
+            result = snapshot.set_many(diff, allow_default=allow_default)
+            self._publish(snapshot)
+            return result
+
+    def set(self, key: str, value: Any, allow_default: bool = True):
+        try:
+            result = self.update({key: value}, allow_default=allow_default)
+        except (TypeError, ValueError):
+            return False
+        return result.get(key, True)
+
+    def load(self, data: dict):
+        self.name = data['name']
+        self.description = data['description']
+        self.update(config_values(data['configs']))
+
+    def load_configs(self, data: dict):
+        """
+        从配置文件的内容更新，支持dump的格式（包含configs，带不带schema都可以）或者直接是配置值的dict
+        :param data:
+        :return:
+        """
+        if 'configs' in data:
+            self.name = data.get('name', self.name)
+            self.description = data.get('description', self.description)
+            data = data['configs']
+        self.update(config_values(data))
+
+    def watch(self, path: str, interval: float = 1.0) -> ConfigFileWatcher:
+        """
+        监控json/yaml配置文件，变化时自动热更新（立即加载一次）
+        :param path: 配置文件
+        :param interval: 轮询间隔（秒）
+        :return: watcher，调用stop()停止监控
+        """
+        return ConfigFileWatcher(path, self.load_configs, interval).start()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+批量转换的公共部分：在线程池或进程池中逐个文件执行转换，单个文件失败不影响其它文件，
+最后打印成功/失败的汇总
+"""
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable
+
+
+def collect_inputs(input_dir: Path, suffix: str, recursive: bool = False) -> list[Path]:
+    """目录下指定后缀的文件（不区分大小写），跳过 ~$ 开头的 Office 临时文件"""
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        p for p in input_dir.glob(pattern)
+        if p.is_file() and p.suffix.lower() == suffix and not p.name.startswith("~$"))
+
+
+def mirror_output_dir(src: Path, input_dir: Path, output_dir: Path) -> Path:
+    """递归模式下在输出目录中镜像源文件所在的子目录"""
+    out = output_dir / src.parent.relative_to(input_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    return out
+
+
+def run_batch(
+        func: Callable, tasks: list[tuple], jobs: int | None = None,
+        processes: bool = False) -> list[tuple[tuple, BaseException]]:
+    """
+    并行执行 func(*task)
+    :param func: 转换函数，进程池时必须是模块级函数
+    :param tasks: 每个文件的参数，第一个参数为输入文件，用于打印进度
+    :param jobs: 并行数，None 表示 CPU 核数
+    :param processes: True 用进程池（CPU 密集的转换），False 用线程池（转换在子进程中执行，例如 pandoc）
+    :return: 失败的任务和异常
+    """
+    jobs = jobs or os.cpu_count() or 1
+    failed = []
+    start = time.perf_counter()
+    pool: Executor = ProcessPoolExecutor(jobs) if processes else ThreadPoolExecutor(jobs)
+    with pool:
+        futures = {pool.submit(func, *task): task for task in tasks}
+        for i, future in enumerate(as_completed(futures), 1):
+            task = futures[future]
+            try:
+                future.result()
+                print(f"[{i}/{len(tasks)}] ✅ {task[0]}")
+            except Exception as e:
+                failed.append((task, e))
+                print(f"[{i}/{len(tasks)}] ❌ {task[0]}: {e}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f"📊 {len(tasks) - len(failed)} converted, {len(failed)} failed, {elapsed:.1f}s")
+    for task, e in failed:
+        print(f"   ❌ {task[0]}: {e}", file=sys.stderr)
+    return failed
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+move_dir 的性能测试：在临时目录中生成大量文件，分别用旧的逐个 isfile/exists 的实现和新的
+scandir + 目标索引 + 线程池实现移动（-p rename），在 files 目录下运行：
+
+    python benchmark.py --files 1000000 --dirs 100
+    python benchmark.py --scenario collisions --heavy-collisions 2000
+
+场景：
+    plain       一半的文件在目标中已存在，并且已有 --collisions 个重命名的版本
+    collisions  每个文件在目标中都已存在，并且同一个 stem 已有 --heavy-collisions 个重命名的版本，
+                旧实现每个文件要逐个 exists 探测 name_1, name_2, ...，是 TargetIndex 针对的平方复杂度的情况
+    large-target 目标目录中另有 --target-files 个无关的文件，新实现要 scandir 整个目标目录建索引，
+                移动的文件远少于目标目录中的文件时，新实现比逐个 exists 慢
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    from . import move_dir
+except ImportError:
+    import move_dir
+
+
+def make_tree(root: str, files: int, dirs: int, collisions: int, collide_every: int = 2, extra: int = 0) -> None:
+    """
+    生成 src/dNNN/fileNNNNNNN.txt，并在 dst 的对应子目录中预先放好同名文件以及 _1.._collisions 的重命名文件
+    :param collide_every: 每隔几个文件在目标中预先放一个同名文件，1 表示全部冲突
+    :param extra: 目标目录中另外放的无关文件总数
+    """
+    per_dir = max(files // dirs, 1)
+    per_dir_extra = extra // dirs
+    for d in range(dirs):
+        sub = f"d{d:04d}"
+        src_dir = os.path.join(root, "src", sub)
+        dst_dir = os.path.join(root, "dst", sub)
+        os.makedirs(src_dir)
+        os.makedirs(dst_dir)
+        for i in range(per_dir):
+            name = f"file{i:07d}"
+            open(os.path.join(src_dir, name + ".txt"), "wb").close()
+            if i % collide_every == 0:
+                # 目标中已存在，且已经有若干个重命名的版本
+                open(os.path.join(dst_dir, name + ".txt"), "wb").close()
+                for k in range(1, collisions + 1):
+                    open(os.path.join(dst_dir, f"{name}_{k}.txt"), "wb").close()
+        for k in range(per_dir_extra):
+            open(os.path.join(dst_dir, f"other{k:07d}.dat"), "wb").close()
+
+
+def legacy_resolve_conflict(tgt_dir: str, fname: str, policy: str) -> str | None:
+    """旧的实现：每次冲突都逐个 exists 探测 name_1, name_2, ..."""
+    dst_path = os.path.join(tgt_dir, fname)
+    if not os.path.exists(dst_path):
+        return dst_path
+    if policy == "rename":
+        stem, ext = os.path.splitext(fname)
+        i = 1
+        while True:
+            dst_path = os.path.join(tgt_dir, f"{stem}_{i}{ext}")
+            if not os.path.exists(dst_path):
+                return dst_path
+            i += 1
+    return dst_path if policy == "overwrite" else None
+
+
+def legacy_run(src: str, dst: str) -> int:
+    """旧的主循环：os.walk + isfile + exists + shutil.move，逐个顺序执行"""
+    moved = 0
+    for root, _, files in os.walk(src):
+        for fname in files:
+            src_path = os.path.join(root, fname)
+            if not os.path.isfile(src_path):
+                continue
+            if not move_dir.should_select(fname, "subfix", "txt"):
+                continue
+            tgt_dir = os.path.join(dst, os.path.relpath(root, src))
+            os.makedirs(tgt_dir, exist_ok=True)
+            dst_path = legacy_resolve_conflict(tgt_dir, fname, "rename")
+            if dst_path is not None:
+                shutil.move(src_path, dst_path)
+                moved += 1
+    return moved
+
+
+def run_scenario(label: str, args, files: int, collisions: int, collide_every: int = 2, extra: int = 0) -> None:
+    engines = [("scandir+index", None)] if args.skip_legacy else [("legacy", legacy_run), ("scandir+index", None)]
+    for name, legacy in engines:
+        with tempfile.TemporaryDirectory(dir=args.dir) as root:
+            make_tree(root, files, args.dirs, collisions, collide_every, extra)
+            src, dst = os.path.join(root, "src"), os.path.join(root, "dst")
+            start = time.perf_counter()
+            if legacy is not None:
+                moved = legacy(src, dst)
+            else:
+                moved = move_dir.run_moves(
+                    src, dst, True, "subfix", "txt", "rename", action=True, jobs=args.jobs, quiet=True)["moved"]
+            elapsed = time.perf_counter() - start
+            print(f"{label:>12} {name:>14}: moved {moved:,} files in {elapsed:.2f}s, {moved / elapsed:,.0f} files/s")
+            sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark move_dir on a synthetic tree")
+    parser.add_argument("--files", type=int, default=1_000_000, help="count of source files of the plain scenario")
+    parser.add_argument("--dirs", type=int, default=100, help="count of source subdirectories")
+    parser.add_argument("--collisions", type=int, default=3, help="existing renamed copies per colliding name")
+    parser.add_argument(
+        "--heavy-files", type=int, default=1_000, help="count of source files of the collisions scenario")
+    parser.add_argument(
+        "--heavy-collisions", type=int, default=500,
+        help="existing renamed copies per name in the collisions scenario")
+    parser.add_argument(
+        "--target-files", type=int, default=200_000, help="unrelated files in the target of the large-target scenario")
+    parser.add_argument(
+        "--scenario", choices=["plain", "collisions", "large-target", "all"], default="all",
+        help="scenario to run (default: all)")
+    parser.add_argument("--jobs", type=int, default=8, help="threads of the new engine")
+    parser.add_argument("--skip-legacy", action="store_true", help="only run the new engine")
+    parser.add_argument("--dir", default=None, help="where to create the temporary trees")
+    args = parser.parse_args()
+
+    if args.scenario in ("plain", "all"):
+        run_scenario("plain", args, args.files, args.collisions)
+    if args.scenario in ("collisions", "all"):
+        run_scenario("collisions", args, args.heavy_files, args.heavy_collisions, collide_every=1)
+    if args.scenario in ("large-target", "all"):
+        # 要移动的文件很少，主要比较建索引的 scandir 和逐个 exists 的差别
+        run_scenario("large-target", args, args.heavy_files, 0, extra=args.target_files)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,27 @@
+#!/usr/bin/env python3
+"""
+CSV 转 Markdown 表格，逐行流式处理，内存占用和文件大小无关：
+
+    python csv2md.py data.csv > data.md
+    python csv2md.py data.csv -o data.md --align    # 两遍扫描（mmap），按列宽对齐
+    python csv2md.py csv_dir -o md_dir -r -j 8       # 批量转换目录树，多进程并行
+"""
+import argparse
 import csv
+import io
+import mmap
 import sys
+import unicodedata
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+try:
+    from . import batch
+except ImportError:
+    import batch
+
+# 每攒够这么多行写一次，减少 write 调用
+FLUSH_ROWS = 1000
 
 
 def escape_cell(s: str) -> str:
@@ -23,23 +45,151 @@ def escape_cell(s: str) -> str:
     return s
 
 
-csv_path = sys.argv[1]
+def display_width(s: str) -> int:
+    """等宽字体下的显示宽度，中日韩等全角字符算 2"""
+    if s.isascii():
+        return len(s)
+    return sum(2 if unicodedata.east_asian_width(c) in ("W", "F") else 1 for c in s)
+
+
+def iter_table_rows(rows: Iterable[list[str]]) -> Iterator[list[str]]:
+    """转义后的表头和表体，表体按表头补齐或截断"""
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    n = len(header)
+    yield [escape_cell(x) for x in header]
+    for r in rows:
+        if len(r) < n:
+            r = r + [""] * (n - len(r))
+        yield [escape_cell(x) for x in r[:n]]
+
+
+def format_row(cells: list[str], widths: list[int] | None = None) -> str:
+    if widths is not None:
+        cells = [c + " " * (w - display_width(c)) for c, w in zip(cells, widths)]
+    return "| " + " | ".join(cells) + " |\n"
+
+
+def write_table(rows: Iterable[list[str]], out: TextIO, widths: list[int] | None = None) -> int:
+    """
+    把 CSV 行写成 Markdown 表格
+    :param rows: csv.reader 之类的行迭代器，第一行为表头
+    :param out: 输出
+    :param widths: 每列的显示宽度，None 表示不对齐
+    :return: 表体行数
+    """
+    table = iter_table_rows(rows)
+    header = next(table, None)
+    if header is None:
+        return 0
+    separator = ["-" * w for w in widths] if widths is not None else ["---" for _ in header]
+    buf = [format_row(header, widths), format_row(separator)]
+    count = 0
+    for cells in table:
+        buf.append(format_row(cells, widths))
+        count += 1
+        if len(buf) >= FLUSH_ROWS:
+            out.write("".join(buf))
+            buf.clear()
+    out.write("".join(buf))
+    return count
+
+
+def _iter_lines(mm: mmap.mmap, encoding: str) -> Iterator[str]:
+    mm.seek(0)
+    for line in iter(mm.readline, b""):
+        yield line.decode(encoding)
+
+
+def column_widths(rows: Iterable[list[str]]) -> list[int]:
+    """第一遍扫描：每列转义后的最大显示宽度（至少 3，和分隔行一致）"""
+    widths = None
+    for cells in iter_table_rows(rows):
+        if widths is None:
+            widths = [3] * len(cells)
+        for i, c in enumerate(cells):
+            w = display_width(c)
+            if w > widths[i]:
+                widths[i] = w
+    return widths or []
+
+
+def convert(csv_path: str, out: TextIO, encoding: str = "utf-8", align: bool = False) -> int:
+    """
+    转换一个 CSV 文件
+    :param csv_path: CSV 文件
+    :param out: 输出
+    :param encoding: CSV 文件编码
+    :param align: 是否按列宽对齐，需要两遍扫描（文件用 mmap 映射，不会读进内存）
+    :return: 表体行数
+    """
+    if not align:
+        with open(csv_path, newline="", encoding=encoding) as f:
+            return write_table(csv.reader(f), out)
+
+    with open(csv_path, "rb") as f:
+        if f.seek(0, io.SEEK_END) == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            widths = column_widths(csv.reader(_iter_lines(mm, encoding)))
+            return write_table(csv.reader(_iter_lines(mm, encoding)), out, widths)
+
+
+def convert_file(csv_path: str, md_path: str, encoding: str = "utf-8", align: bool = False) -> int:
+    """转换一个 CSV 文件并写入 md_path，失败时删除写了一半的输出"""
+    try:
+        with open(md_path, "w", encoding="utf-8", newline="", buffering=1 << 20) as out:
+            return convert(csv_path, out, encoding, align)
+    except BaseException:
+        Path(md_path).unlink(missing_ok=True)
+        raise
+
+
+def convert_dir(
+        input_dir: Path, output_dir: Path, encoding: str = "utf-8", align: bool = False,
+        recursive: bool = False, jobs: int | None = None) -> list:
+    """
+    批量转换目录下的 CSV 文件，每个文件输出为 {stem}.md，递归时镜像子目录
+    :return: 失败的文件和异常
+    """
+    tasks = []
+    for f in batch.collect_inputs(input_dir, ".csv", recursive):
+        out = batch.mirror_output_dir(f, input_dir, output_dir) if recursive else output_dir
+        tasks.append((str(f), str(out / f"{f.stem}.md"), encoding, align))
+    if not tasks:
+        print("⚠️  No .csv files found.")
+        return []
+    return batch.run_batch(convert_file, tasks, jobs, processes=True)
 
-with open(csv_path, newline="", encoding="utf-8") as f:
-    reader = csv.reader(f)
-    rows = list(reader)
 
-if not rows:
-    sys.exit(0)
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="csv2md", description="Convert a CSV file to a Markdown table")
+    parser.add_argument("input", help="Input .csv file, or a directory to convert every .csv file in it")
+    parser.add_argument(
+        "-o", "--output",
+        help='Output .md file (default: stdout), or output directory for a directory input (default: "./output")')
+    parser.add_argument("-r", "--recursive", action="store_true", help="Convert the whole directory tree")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Worker processes for a directory input (default: CPU count)")
+    parser.add_argument("--encoding", default="utf-8", help="Encoding of the CSV file (default: utf-8)")
+    parser.add_argument(
+        "--align", action="store_true",
+        help="Pad the columns to the same width, reads the file twice")
+    args = parser.parse_args()
 
-header = rows[0]
-body = rows[1:]
+    input_path = Path(args.input).expanduser()
+    if input_path.is_dir():
+        output_dir = Path(args.output or "./output").expanduser()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        if convert_dir(input_path, output_dir, args.encoding, args.align, args.recursive, args.jobs):
+            sys.exit(1)
+    elif args.output:
+        convert_file(args.input, args.output, args.encoding, args.align)
+    else:
+        convert(args.input, sys.stdout, args.encoding, args.align)
 
-# 表头
-print("| " + " | ".join(escape_cell(x) for x in header) + " |")
-print("| " + " | ".join("---" for _ in header) + " |")
 
-# 表体
-for r in body:
-    r = r + [""] * (len(header) - len(r))
-    print("| " + " | ".join(escape_cell(x) for x in r[:len(header)]) + " |")
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,23 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
+import json
+import os
 import shutil
 import subprocess
 import sys
+from collections import Counter
 from pathlib import Path
 
+try:
+    from . import batch
+except ImportError:
+    import batch
+
+MANIFEST_NAME = ".docx2md-manifest.json"
+# 计算哈希时每次读取的字节数
+DIGEST_CHUNK = 1 << 20
+
 
 def which_or_exit(cmd: str) -> None:
     if shutil.which(cmd) is None:
@@ -12,7 +25,103 @@ def which_or_exit(cmd: str) -> None:
         sys.exit(1)
 
 
-def run_pandoc(abs_docx: Path, output_dir: Path) -> None:
+def pandoc_version() -> str:
+    out = subprocess.run(["pandoc", "--version"], capture_output=True, text=True, check=True).stdout
+    return out.splitlines()[0].strip() if out else ""
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Manifest:
+    """
+    输出目录中记录每个输入文件的内容哈希和 pandoc 版本，内容和 pandoc 版本都没变、输出也还在的文件不再转换。
+    先比较大小和 mtime，变了才计算哈希，所以没有变化的目录树重跑只需要 stat 每个文件。
+    """
+
+    def __init__(self, output_dir: Path, pandoc: str, force: bool = False):
+        """
+        :param force: 仍然读取和更新清单，但 is_current 总是返回 False，所有文件都重新转换
+        """
+        self.output_dir = output_dir
+        self.path = output_dir / MANIFEST_NAME
+        self.pandoc = pandoc
+        self.force = force
+        self.entries: dict[str, dict] = {}
+
+    def load(self) -> "Manifest":
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+        return self
+
+    def save(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"pandoc": self.pandoc, "files": self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def is_current(self, src: Path, out_md: Path) -> bool:
+        entry = self.entries.get(str(src))
+        if self.force or entry is None or entry["pandoc"] != self.pandoc or not out_md.exists():
+            return False
+        st = src.stat()
+        if entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return True
+        if entry["hash"] != file_digest(src):
+            return False
+        # 只是 mtime 变了（例如复制、touch），内容没变
+        entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+        return True
+
+    def record(self, src: Path, out_md: Path) -> None:
+        st = src.stat()
+        self.entries[str(src)] = {
+            "hash": file_digest(src),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "pandoc": self.pandoc,
+            "output": out_md.relative_to(self.output_dir).as_posix(),
+        }
+
+    def prune(self, input_root: Path, scanned: list[Path], recursive: bool) -> list[str]:
+        """
+        删除已经不存在的输入文件对应的 md 和 _images 目录。
+        只处理本次扫描范围内（input_root 下，非递归时只有 input_root 这一层）、扫描结果里没有、确认已经不存在的输入，
+        用同一个输出目录转换其它目录的文件不受影响；还有其它输入记录了同一个输出时只删除清单中的记录
+        :param input_root: 本次扫描的输入目录（绝对路径）
+        :param scanned: 本次扫描到的输入文件（绝对路径）
+        :param recursive: 是否递归扫描
+        :return: 被删除的输入文件
+        """
+        seen = {str(p) for p in scanned}
+        # 非递归时不同目录下的同名文件输出到同一个 {stem}.md，还有别的输入在用的输出不能删除
+        users = Counter(entry["output"] for entry in self.entries.values())
+        removed = []
+        for src, entry in list(self.entries.items()):
+            path = Path(src)
+            in_scope = path.parent == input_root or (recursive and path.is_relative_to(input_root))
+            if not in_scope or src in seen or path.exists():
+                continue
+            del self.entries[src]
+            removed.append(src)
+            users[entry["output"]] -= 1
+            if users[entry["output"]]:
+                continue
+            out_md = self.output_dir / entry["output"]
+            out_md.unlink(missing_ok=True)
+            shutil.rmtree(out_md.with_name(f"{out_md.stem}_images"), ignore_errors=True)
+        return removed
+
+
+def run_pandoc(abs_docx: Path, output_dir: Path, quiet: bool = False) -> None:
     base = abs_docx.stem
     out_md = output_dir / f"{base}.md"
     media_dir_name = f"{base}_images"  # 注意：相对于 output_dir
@@ -35,12 +144,21 @@ def run_pandoc(abs_docx: Path, output_dir: Path) -> None:
         "--wrap=none",
     ]
 
+    if quiet:
+        # 并行转换时不直接输出 pandoc 的信息，失败时放进异常里
+        proc = subprocess.run(cmd, cwd=str(output_dir), capture_output=True, text=True)
+        if proc.returncode != 0:
+            if not any(media_dir.iterdir()):
+                media_dir.rmdir()
+            raise RuntimeError(f"pandoc exited with {proc.returncode}: {proc.stderr.strip()}")
+        return
+
     print(f"➡️  Converting: {abs_docx} -> {out_md}")
     subprocess.run(cmd, cwd=str(output_dir), check=True)
     print(f"✅  Output: {out_md}")
 
 
-def collect_docx_inputs(input_path: Path) -> list[Path]:
+def collect_docx_inputs(input_path: Path, recursive: bool = False) -> list[Path]:
     if input_path.is_file():
         if input_path.suffix.lower() != ".docx":
             print("❌ Input file must be .docx", file=sys.stderr)
@@ -48,8 +166,7 @@ def collect_docx_inputs(input_path: Path) -> list[Path]:
         return [input_path]
 
     if input_path.is_dir():
-        files = sorted(input_path.glob("*.docx"))
-        return files
+        return batch.collect_inputs(input_path, ".docx", recursive)
 
     print(f"❌ Input not found: {input_path}", file=sys.stderr)
     sys.exit(1)
@@ -71,6 +188,25 @@ def main() -> None:
         default="./output",
         help='Output directory (default: "./output")',
     )
+    parser.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="Convert the whole directory tree, mirroring the subdirectories in the output directory",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Count of pandoc processes run in parallel (default: CPU count)",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help=f"Convert every file again, without checking the {MANIFEST_NAME} cache in the output directory",
+    )
 
     args = parser.parse_args()
 
@@ -80,17 +216,43 @@ def main() -> None:
     output_dir = Path(args.output).expanduser()
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    docx_files = collect_docx_inputs(input_path)
-    if not docx_files:
-        print("⚠️  No .docx files found.")
-        return
+    docx_files = collect_docx_inputs(input_path, args.recursive)
+    manifest = Manifest(output_dir.resolve(), pandoc_version(), force=args.force).load()
+    if input_path.is_dir():
+        for src in manifest.prune(input_path.resolve(), [f.resolve() for f in docx_files], args.recursive):
+            print(f"🧹 Removed outputs of deleted input: {src}")
 
-    # 绝对路径：避免 cwd=output_dir 后路径失效
+    tasks, skipped = [], 0
     for f in docx_files:
-        abs_docx = f.resolve()
-        run_pandoc(abs_docx, output_dir)
+        out = batch.mirror_output_dir(f, input_path, output_dir) if args.recursive else output_dir
+        # 绝对路径：避免 cwd=output_dir 后路径失效
+        abs_docx, out = f.resolve(), out.resolve()
+        if manifest.is_current(abs_docx, out / f"{abs_docx.stem}.md"):
+            skipped += 1
+            continue
+        tasks.append((abs_docx, out, len(docx_files) > 1))
+
+    try:
+        if not docx_files:
+            print("⚠️  No .docx files found.")
+            return
+        if skipped:
+            print(f"⏭️  {skipped} unchanged file(s) skipped.")
+        if len(tasks) == 1 and len(docx_files) == 1:
+            run_pandoc(*tasks[0])
+            failed = []
+        else:
+            failed = batch.run_batch(run_pandoc, tasks, args.jobs) if tasks else []
+        failed_inputs = {task[0] for task, _ in failed}
+        for abs_docx, out, _ in tasks:
+            if abs_docx not in failed_inputs:
+                manifest.record(abs_docx, out / f"{abs_docx.stem}.md")
+    finally:
+        manifest.save()
 
     print(f"🎉 Done. Output directory: {output_dir}")
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,13 @@ import argparse
 import os
 import shutil
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from . import xmove
+except ImportError:
+    import xmove
 
 IMG_SUFFIXES = {
     "jpg", "jpeg", "png", "bmp", "gif", "webp", "tif", "tiff", "svg", "heic", "heif"
@@ -12,6 +19,7 @@ IMG_SUFFIXES = {
 TXT_SUFFIXES = {
     "txt", "md", "csv", "tsv", "json", "yaml", "yml", "xml", "ini", "log", "toml"
 }
+JOURNAL_NAME = ".move_dir-journal.jsonl"
 
 
 def parse_args():
@@ -29,15 +37,15 @@ def parse_args():
         formatter_class=argparse.RawTextHelpFormatter,
         add_help=True,
     )
-    parser.add_argument("-s", "--source", required=True, help="源目录 SRC_DIR")
-    parser.add_argument("-t", "--target", required=True, help="目标目录 TRG_DIR")
+    parser.add_argument("-s", "--source", help="源目录 SRC_DIR")
+    parser.add_argument("-t", "--target", help="目标目录 TRG_DIR")
     parser.add_argument("-r", "--recursive", action="store_true", help="递归遍历源目录")
     parser.add_argument(
-        "-m", "--match", required=True,
+        "-m", "--match",
         choices=["len", "str", "type", "subfix"],
         help="匹配类型：len/str/type/subfix")
     parser.add_argument(
-        "-v", "--value", required=True,
+        "-v", "--value",
         help="匹配值：len=整数；str=子串；subfix=后缀；type=img|txt")
     parser.add_argument(
         "-a", "--action", action="store_true",
@@ -46,8 +54,32 @@ def parse_args():
         "-p", "--on-exist-policy", choices=["skip", "rename", "overwrite"],
         default="skip",
         help="目标已存在时的处理策略：skip(跳过, 默认)/rename(自动重命名)/overwrite(覆盖)")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=8,
+        help="并行移动的线程数（默认 8）")
+    parser.add_argument(
+        "-q", "--quiet", action="store_true",
+        help="不打印每个文件的 mv 命令，只打印汇总")
+    parser.add_argument(
+        "--journal", default=None,
+        help=f"移动日志文件（默认为目标目录下的 {JOURNAL_NAME}），中断后重新运行会先根据日志恢复")
+    parser.add_argument(
+        "--no-journal", action="store_true",
+        help="不记录移动日志")
+    parser.add_argument(
+        "--undo", action="store_true",
+        help="根据移动日志撤销最近一次运行的移动（把文件移回源路径），只需要 -t 或 --journal")
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.undo:
+        required = [] if args.journal else [("-t/--target", args.target)]
+    else:
+        required = [("-s/--source", args.source), ("-t/--target", args.target),
+                    ("-m/--match", args.match), ("-v/--value", args.value)]
+    missing = [name for name, value in required if value is None]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)}")
+    return args
 
 
 def norm_suffix(s: str) -> str:
@@ -104,83 +136,193 @@ def should_select(fname: str, mtype: str, mval: str) -> bool:
 
 
 def iter_files(src: str, recursive: bool):
-    if recursive:
-        for root, dirs, files in os.walk(src):
-            for f in files:
-                yield root, f
-    else:
-        for f in os.listdir(src):
-            p = os.path.join(src, f)
-            if os.path.isfile(p):
-                yield src, f
+    """
+    用 os.scandir 遍历源目录，文件类型来自目录项本身，不需要对每个文件再调用 isfile；
+    顺序和 os.walk 相同：先当前目录的文件，再依次进入子目录（不跟随目录的符号链接）
+    """
+    subdirs = []
+    with os.scandir(src) as it:
+        for entry in it:
+            try:
+                if entry.is_file():
+                    yield src, entry.name
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+            except OSError:
+                continue
+    for d in subdirs:
+        yield from iter_files(d, recursive)
+
+
+class TargetIndex:
+    """
+    目标目录中已有文件名的内存索引，每个目标目录只 scandir 一次，冲突判断和重命名都是 O(1)。
+    已经分配出去的目标名也会加入索引，所以 dry-run 打印的目标和实际执行时一致。
+    """
+
+    def __init__(self):
+        self._names: dict[str, set[str]] = {}
+        self._next: dict[tuple[str, str, str], int] = {}
+
+    def names(self, tgt_dir: str) -> set[str]:
+        names = self._names.get(tgt_dir)
+        if names is None:
+            try:
+                with os.scandir(tgt_dir) as it:
+                    names = {entry.name for entry in it}
+            except FileNotFoundError:
+                names = set()
+            self._names[tgt_dir] = names
+        return names
+
+    def resolve(self, tgt_dir: str, fname: str, policy: str) -> str | None:
+        """根据 on-exist 策略生成目标路径。若跳过则返回 None。"""
+        names = self.names(tgt_dir)
+        if fname not in names:
+            names.add(fname)
+            return os.path.join(tgt_dir, fname)
+
+        if policy == "skip":
+            print(f"[SKIP] 已存在: {os.path.join(tgt_dir, fname)}")
+            return None
+        elif policy == "rename":
+            stem, ext = os.path.splitext(fname)
+            # 记住每个 stem 上次用到的序号，名字只增不减，所以从上次的位置继续找就是第一个空位
+            key = (tgt_dir, stem, ext)
+            i = self._next.get(key, 1)
+            while f"{stem}_{i}{ext}" in names:
+                i += 1
+            self._next[key] = i + 1
+            new_name = f"{stem}_{i}{ext}"
+            names.add(new_name)
+            return os.path.join(tgt_dir, new_name)
+        elif policy == "overwrite":
+            return os.path.join(tgt_dir, fname)
+        return None
 
 
-def resolve_conflict(tgt_dir: str, fname: str, policy: str) -> str | None:
-    """根据 on-exist 策略生成目标路径。若跳过则返回 None。"""
-    dst_path = os.path.join(tgt_dir, fname)
+def move_file(src_path: str, dst_path: str, cross_device: bool = False) -> None:
+    if cross_device:
+        # 跨文件系统：内核内拷贝到临时文件再 rename，最后删除源文件
+        xmove.copy_move(src_path, dst_path)
+        os.remove(src_path)
+        return
+    try:
+        # 同一文件系统内直接 rename，失败（跨设备等）再交给 shutil.move
+        os.rename(src_path, dst_path)
+    except OSError:
+        shutil.move(src_path, dst_path)
+
+
+def is_cross_device(src: str, dst: str) -> bool:
+    """
+    只比较源目录和目标目录本身所在的设备，不逐个子目录检查。
+    根目录在同一设备、但某个子目录是另一个挂载点时，rename 会以 EXDEV 失败，move_file/MoveJournal.move 会退回拷贝；
+    根目录在不同设备、但某个子目录挂载回了同一设备时，仍然走拷贝，结果正确，只是没有用上 rename
+    """
+    return os.stat(src).st_dev != os.stat(dst).st_dev
+
+
+def plan_moves(src: str, dst: str, recursive: bool, mtype: str, mval: str, policy: str, stats: dict):
+    """
+    遍历源目录并按策略分配目标路径，在调用方线程中顺序执行，保证结果确定
+    :param stats: 累计 total/selected
+    :return: (源文件, 目标路径) 的生成器
+    """
+    index = TargetIndex()
+    made_dirs = set()
+    for root, fname in iter_files(src, recursive):
+        stats["total"] += 1
+
+        if not should_select(fname, mtype, mval):
+            continue
 
-    if not os.path.exists(dst_path):
-        return dst_path
+        stats["selected"] += 1
+        rel_dir = os.path.relpath(root, src) if recursive else "."
+        tgt_dir = dst if rel_dir == "." else os.path.join(dst, rel_dir)
+        if tgt_dir not in made_dirs:
+            os.makedirs(tgt_dir, exist_ok=True)
+            made_dirs.add(tgt_dir)
 
-    if policy == "skip":
-        print(f"[SKIP] 已存在: {dst_path}")
-        return None
-    elif policy == "rename":
-        stem, ext = os.path.splitext(fname)
-        i = 1
-        while True:
-            new_name = f"{stem}_{i}{ext}"
-            dst_path = os.path.join(tgt_dir, new_name)
-            if not os.path.exists(dst_path):
-                return dst_path
-            i += 1
-    elif policy == "overwrite":
-        return dst_path
-    return None
+        dst_path = index.resolve(tgt_dir, fname, policy)
+        if dst_path is None:
+            continue
+        yield os.path.join(root, fname), dst_path
+
+
+def run_moves(
+        src: str, dst: str, recursive: bool, mtype: str, mval: str, policy: str,
+        action: bool = False, jobs: int = 8, quiet: bool = False, journal: "xmove.MoveJournal | None" = None) -> dict:
+    """
+    匹配并移动文件，移动在线程池中并行执行
+    :param journal: 移动日志，None 表示不记录
+    :return: total/selected/moved/failed 计数
+    """
+    stats = {"total": 0, "selected": 0, "moved": 0, "failed": 0}
+    os.makedirs(dst, exist_ok=True)
+    cross_device = is_cross_device(src, dst)
+    mover = journal.move if journal is not None else move_file
+
+    def done(future, src_path, dst_path):
+        try:
+            future.result()
+            stats["moved"] += 1
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"[ERROR] 移动失败: {src_path} -> {dst_path} | {e}", file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        pending = deque()
+        for src_path, dst_path in plan_moves(src, dst, recursive, mtype, mval, policy, stats):
+            if not quiet:
+                print(f"mv '{src_path}' '{dst_path}'")
+            if not action:
+                continue
+            pending.append((executor.submit(mover, src_path, dst_path, cross_device), src_path, dst_path))
+            # 限制排队的任务数，内存占用和文件数量无关
+            while len(pending) > jobs * 64:
+                done(*pending.popleft())
+        while pending:
+            done(*pending.popleft())
+    return stats
 
 
 def main():
     args = parse_args()
+    if args.undo:
+        journal = xmove.MoveJournal(args.journal or os.path.join(os.path.abspath(args.target), JOURNAL_NAME))
+        undone, errors = journal.undo()
+        journal.close()
+        for e in errors:
+            print(f"[ERROR] 撤销失败: {e}", file=sys.stderr)
+        print(f"[SUMMARY] 撤销: {undone}, 失败: {len(errors)}")
+        sys.exit(1 if errors else 0)
+
     src = os.path.abspath(args.source)
     dst = os.path.abspath(args.target)
-
     if not os.path.isdir(src):
         print(f"[ERROR] 源目录不存在或不是目录: {src}", file=sys.stderr)
         sys.exit(2)
 
-    total = 0
-    selected = 0
-    moved = 0
-
-    os.makedirs(dst, exist_ok=True)
-
-    for root, fname in iter_files(src, args.recursive):
-        src_path = os.path.join(root, fname)
-        if not os.path.isfile(src_path):
-            continue
-        total += 1
-
-        if not should_select(fname, args.match, args.value):
-            continue
-
-        selected += 1
-        rel_dir = os.path.relpath(root, src) if args.recursive else "."
-        tgt_dir = dst if rel_dir == "." else os.path.join(dst, rel_dir)
-        os.makedirs(tgt_dir, exist_ok=True)
-
-        dst_path = resolve_conflict(tgt_dir, fname, args.on_exist_policy)
-        if dst_path is None:
-            continue
-
-        print(f"mv '{src_path}' '{dst_path}'")
-        if args.action:
-            try:
-                shutil.move(src_path, dst_path)
-                moved += 1
-            except Exception as e:
-                print(f"[ERROR] 移动失败: {src_path} -> {dst_path} | {e}", file=sys.stderr)
-
-    print(f"\n[SUMMARY] 总文件: {total}, 命中: {selected}, 实际移动: {moved if args.action else 0}")
+    journal = None
+    if args.action and not args.no_journal:
+        journal = xmove.MoveJournal(args.journal or os.path.join(dst, JOURNAL_NAME))
+    if journal is not None:
+        finished, rolled_back = journal.recover()
+        if finished or rolled_back:
+            print(f"[RESUME] 根据日志完成了 {finished} 个中断的移动，回滚了 {rolled_back} 个未完成的拷贝")
+    try:
+        stats = run_moves(
+            src, dst, args.recursive, args.match, args.value, args.on_exist_policy,
+            action=args.action, jobs=args.jobs, quiet=args.quiet, journal=journal)
+    finally:
+        if journal is not None:
+            journal.close()
+
+    print(f"\n[SUMMARY] 总文件: {stats['total']}, 命中: {stats['selected']}, "
+          f"实际移动: {stats['moved'] if args.action else 0}")
+    if stats["failed"]:
+        print(f"[SUMMARY] 移动失败: {stats['failed']}", file=sys.stderr)
     if not args.action:
         print("[INFO] 当前为 Dry-Run（仅打印命令）。加 -a/--action 才执行移动。")
 
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨文件系统移动：内核内拷贝（copy_file_range，不支持时退回 sendfile）+ 预写日志。
+
+每个文件的移动在日志中依次记录 begin -> copied -> done：
+    begin   已分配目标路径，开始拷贝到目标目录下的临时文件
+    copied  临时文件已 fsync 并 rename 为目标文件，源文件还在
+    done    源文件已删除
+中断后 recover() 只需要删除 copied 状态的源文件、清理 begin 状态留下的临时文件，已拷贝完成的文件不会重新拷贝；
+undo() 按相反顺序把最近一次运行移动的文件移回源路径。同一文件系统内的移动（rename）是原子的，
+完成后只记录一条 done，同样可以撤销。
+"""
+import errno
+import json
+import os
+import shutil
+import threading
+
+# copy_file_range/sendfile 不可用时退回用户态拷贝的错误
+_FALLBACK_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+CHUNK = 1 << 30
+
+
+def part_path(dst: str) -> str:
+    """目标目录下的临时文件，隐藏文件名，不会和目标索引中的名字冲突"""
+    head, tail = os.path.split(dst)
+    return os.path.join(head, f".{tail}.move_dir-part")
+
+
+def kernel_copy(src: str, dst: str) -> None:
+    """
+    在内核中拷贝文件内容，数据不经过用户态：优先 copy_file_range（可能使用 reflink/服务端拷贝），
+    跨文件系统不支持时用 sendfile，都不可用时用 shutil.copyfileobj
+    """
+    with open(src, "rb") as fi, open(dst, "wb") as fo:
+        size = os.fstat(fi.fileno()).st_size
+        for copy in (_copy_file_range, _sendfile):
+            if copy is None:
+                continue
+            try:
+                offset = copy(fi.fileno(), fo.fileno(), 0, size)
+                break
+            except OSError as e:
+                # 异常时拿不到返回值，已经拷贝的字节数以输出文件的位置为准，拷贝了一部分就不能再换一种方式从头拷贝
+                if e.errno not in _FALLBACK_ERRNOS or os.lseek(fo.fileno(), 0, os.SEEK_CUR):
+                    raise
+                # 保险起见，换一种方式之前把两个文件都回到开头
+                fi.seek(0)
+                fo.seek(0)
+                fo.truncate()
+        else:
+            shutil.copyfileobj(fi, fo, 1 << 20)
+            offset = size
+        if offset < size:
+            # 拷贝过程中源文件被截断
+            raise OSError(errno.EIO, f"Short copy: {offset} of {size} bytes", src)
+        fo.flush()
+        written = os.fstat(fo.fileno()).st_size
+        if written != size:
+            raise OSError(errno.EIO, f"Copied {written} bytes instead of {size}", dst)
+        os.fsync(fo.fileno())
+    shutil.copystat(src, dst)
+
+
+def _copy_file_range_impl(fd_in: int, fd_out: int, offset: int, size: int) -> int:
+    while offset < size:
+        n = os.copy_file_range(fd_in, fd_out, min(CHUNK, size - offset))
+        if n == 0:
+            break
+        offset += n
+    return offset
+
+
+def _sendfile_impl(fd_in: int, fd_out: int, offset: int, size: int) -> int:
+    while offset < size:
+        n = os.sendfile(fd_out, fd_in, offset, min(CHUNK, size - offset))
+        if n == 0:
+            break
+        offset += n
+    return offset
+
+
+_copy_file_range = _copy_file_range_impl if hasattr(os, "copy_file_range") else None
+_sendfile = _sendfile_impl if hasattr(os, "sendfile") else None
+
+
+def copy_move(src: str, dst: str) -> None:
+    """拷贝到临时文件，fsync 后 rename 为目标文件，目标文件要么完整要么不存在"""
+    part = part_path(dst)
+    try:
+        kernel_copy(src, part)
+        os.replace(part, dst)
+    except BaseException:
+        _remove(part)
+        raise
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class MoveJournal:
+    """
+    JSON Lines 格式的预写日志，begin/copied 记录写入后 fsync，进程崩溃后可以恢复或撤销。
+    日志只保存最近一次运行的移动：恢复完成后，本次运行第一次写入时清空旧的记录，文件大小和内存占用不会随运行次数增长
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._load()
+        self._file = None
+        self._truncate = False
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 崩溃时写了一半的最后一行
+                self._apply(record)
+
+    def _apply(self, record: dict) -> None:
+        entry = self.entries.setdefault(record["id"], {})
+        entry.update({k: v for k, v in record.items() if k != "op"})
+        entry["state"] = record["op"]
+        self._next_id = max(self._next_id, record["id"] + 1)
+
+    def _write(self, record: dict, sync: bool = False) -> None:
+        # 调用方持有 _lock
+        if self._truncate:
+            # 新一次运行的第一条记录，之前的移动都已结束，不再保留
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+            self.entries.clear()
+            self._truncate = False
+        elif self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+        self._apply(record)
+
+    def log(self, entry_id: int, op: str, sync: bool = False) -> None:
+        with self._lock:
+            self._write({"id": entry_id, "op": op}, sync)
+
+    def begin(self, src: str, dst: str, mode: str) -> int:
+        with self._lock:
+            entry_id = self._next_id
+            self._write({"id": entry_id, "op": "begin", "src": src, "dst": dst, "mode": mode}, sync=True)
+            return entry_id
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def pending(self) -> list[dict]:
+        return [dict(e, id=i) for i, e in sorted(self.entries.items()) if e["state"] in ("begin", "copied")]
+
+    def move(self, src: str, dst: str, cross_device: bool) -> None:
+        """
+        移动一个文件，同一文件系统内 rename，否则内核拷贝后删除源文件。
+        rename 是原子的，不需要恢复，只在完成后写一条不 fsync 的 done 记录用于撤销；
+        跨文件系统的拷贝才记录 begin -> copied -> done
+        """
+        if not cross_device:
+            try:
+                os.rename(src, dst)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # 子目录是另一个挂载点
+                return self.move(src, dst, True)
+            with self._lock:
+                self._write({"id": self._next_id, "op": "done", "src": src, "dst": dst, "mode": "rename"})
+            return
+        entry_id = self.begin(src, dst, "copy")
+        try:
+            copy_move(src, dst)
+        except BaseException:
+            self.log(entry_id, "aborted")
+            raise
+        self.log(entry_id, "copied", sync=True)
+        os.remove(src)
+        self.log(entry_id, "done")
+
+    def recover(self) -> tuple[int, int]:
+        """
+        完成或回滚上次中断的移动，之后的第一次写入会清空日志
+        :return: (完成的数量, 回滚的数量)
+        """
+        finished = rolled_back = 0
+        for entry in self.pending():
+            if _is_moved(entry):
+                # 目标已完整，只差删除源文件
+                _remove(entry["src"])
+                self.log(entry["id"], "done")
+                finished += 1
+            else:
+                # 拷贝没有完成，删除临时文件，源文件保持不动，下次扫描会重新移动
+                _remove(part_path(entry["dst"]))
+                self.log(entry["id"], "aborted")
+                rolled_back += 1
+        self._truncate = True
+        return finished, rolled_back
+
+    def undo(self) -> tuple[int, list[str]]:
+        """
+        按相反顺序撤销日志中（最近一次运行）的所有移动
+        :return: (撤销的数量, 错误信息)
+        """
+        undone, errors = 0, []
+        for entry_id, entry in sorted(self.entries.items(), reverse=True):
+            state, src, dst = entry["state"], entry.get("src"), entry.get("dst")
+            try:
+                if state == "done":
+                    if os.path.exists(src):
+                        raise FileExistsError(errno.EEXIST, "Source path is occupied", src)
+                    os.makedirs(os.path.dirname(src), exist_ok=True)
+                    if entry["mode"] == "rename":
+                        os.rename(dst, src)
+                    else:
+                        copy_move(dst, src)
+                        os.remove(dst)
+                elif state == "copied":
+                    # 源文件还在，删除目标即可
+                    _remove(dst)
+                elif state == "begin":
+                    _remove(part_path(dst))
+                else:
+                    continue
+            except OSError as e:
+                errors.append(f"{dst} -> {src} | {e}")
+                continue
+            self.log(entry_id, "undone")
+            undone += 1
+        return undone, errors
+
+
+def _is_moved(entry: dict) -> bool:
+    """
+    中断的移动是否已经把完整的文件放到了目标路径，只依据日志：copied 记录在 rename 为目标文件之后才 fsync，
+    源文件也只在 copied 之后删除，所以 begin 状态下即使目标存在、源文件不在也不能当作完成
+    （overwrite 策略下目标可能是原来就有的文件），回滚后由下次扫描重新移动
+    """
+    return entry["state"] == "copied"
@@ -1,11 +1,11 @@
-import qrcode
-
 def generate_qr_code(data: str, filename: str):
     """
     生成二维码并保存到指定文件名
     :param data: 要编码的字符串
     :param filename: 保存二维码的文件名（支持 .png, .jpg 等）
     """
+    import qrcode  # 用到时才导入，import genqr 不需要加载qrcode/PIL
+
     # 创建二维码对象
     qr = qrcode.QRCode(
         version=1,  # 控制二维码大小，1 是最小的
@@ -0,0 +1,26 @@
+"""
+Colored console/file/HTML logging.
+"""
+import importlib
+
+_LAZY = {
+    'ColoredLogger': '.colored_logger',
+    'get_logger': '.colored_logger',
+    'ColoredFormatter': '.formatter',
+    'HTMLFormatter': '.formatter',
+    'JSONFormatter': '.formatter',
+    'LogAggregator': '.aggregator',
+    'NullLogger': '.null_logger',
+    'null_logger': '.null_logger',
+    'PrintLogger': '.null_logger',
+    'print_logger': '.null_logger',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    return value
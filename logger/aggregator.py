@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding=utf-8
+import atexit
+import multiprocessing
+
+from .colored_logger import ColoredLogger
+from .handlers import QueueWriter
+
+
+def _aggregate(record_queue, handler_kwargs: dict):
+    """Entry of the aggregator process: write the records from the queue until a None arrives"""
+    handlers = ColoredLogger.create_handlers(batched=True, **handler_kwargs)
+    writer = QueueWriter(handlers, record_queue=record_queue)
+    # 等待写线程收到None并写完所有记录
+    writer.join()
+    for handler in handlers:
+        handler.flush()
+        handler.close()
+
+
+class LogAggregator:
+    """
+    A single writer process for the logs of several processes.
+
+    The worker processes get their loggers with get_logger(name, aggregator_queue=aggregator.queue),
+    their records are sent through the queue and written in batches by the aggregator process only,
+    so the lines never interleave and the files are opened once. The [pid] of the records is the one
+    of the worker. On stop() every record sent before is written before the aggregator exits, provided
+    the workers exited cleanly: a terminated worker (e.g. leaving 'with multiprocessing.Pool()', which
+    calls terminate()) loses the records still buffered in its queue feeder thread.
+
+    Example:
+        aggregator = LogAggregator(filename='logs/app.log', html='logs/app.html')
+        pool = multiprocessing.Pool(4, initializer=init_worker, initargs=(aggregator.queue,))
+        ...
+        pool.close()
+        pool.join()
+        aggregator.stop()
+    """
+
+    def __init__(
+            self,
+            module_name: str = None,
+            console: bool = False,
+            filename: str | None = None,
+            html: str | None = None,
+            json_lines: bool = False,
+            max_bytes: int = 0,
+            when: str | None = None,
+            backup_count: int = 0,
+            compress: bool = True,
+            context: multiprocessing.context.BaseContext | None = None):
+        """
+        Start the aggregator process, see 'get_logger' for the output arguments.
+
+        Args:
+            context (multiprocessing.context.BaseContext, optional): The multiprocessing context to use,
+                the default context if None.
+        """
+        context = context or multiprocessing.get_context()
+        self.queue = context.Queue()
+        handler_kwargs = {
+            'module_name': module_name, 'console': console, 'filename': filename, 'html': html,
+            'json_lines': json_lines, 'max_bytes': max_bytes, 'when': when,
+            'backup_count': backup_count, 'compress': compress}
+        self.process = context.Process(
+            target=_aggregate, args=(self.queue, handler_kwargs), name='LogAggregator', daemon=True)
+        self.process.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: float | None = None):
+        """
+        Write all the records sent so far and stop the aggregator process. Safe to call more than once.
+        Stop the aggregator after the worker processes have exited, the records sent later are lost.
+
+        Args:
+            timeout (float, optional): Max seconds to wait for the aggregator, None to wait until it is done.
+        """
+        if self.process.is_alive():
+            self.queue.put(None)
+            self.process.join(timeout)
+        atexit.unregister(self.stop)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Benchmarks of the logger package, run with:
+
+    python -m logger.benchmark --records 100000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from .colored_logger import get_logger
+from .formatter import ColoredFormatter
+
+
+class BaselineFormatter(ColoredFormatter):
+    """The uncached ColoredFormatter.format before the hot path work, kept as reference for bench_formatter"""
+
+    def formatTime(self, record, datefmt=None):
+        return logging.Formatter.formatTime(self, record, datefmt)
+
+    def format(self, record):
+        level_name = record.levelname
+        record.message = record.getMessage()
+        record.asctime = self.formatTime(record, self.datefmt)
+        try:
+            task = asyncio.current_task()
+            if task is None:
+                task_info = f't-{threading.current_thread().ident}'
+            else:
+                task_info = f'a-{id(task)}'
+        except RuntimeError:
+            task_info = f't-{threading.current_thread().ident}'
+        filename = self.module_name if self.module_name else record.filename
+        fn, _ = os.path.splitext(filename)
+        return f'[{record.asctime}]{self.colored_level(level_name)}' \
+               f'[{record.process}][{task_info}][{fn}]  {record.message}'
+
+
+def _make_records(count: int) -> list[logging.LogRecord]:
+    levels = [logging.DEBUG, logging.INFO, 25, logging.WARNING, 35, logging.ERROR]
+    files = ['/srv/app/service.py', '/srv/app/worker.py', '/srv/app/db.py']
+    base = time.time()
+    records = []
+    for i in range(count):
+        record = logging.LogRecord(
+            'bench', levels[i % len(levels)], files[i % len(files)], i, 'record %d of %s', (i, 'bench'), None)
+        # 模拟每秒约1000条日志
+        record.created = base + i / 1000
+        record.msecs = int((record.created - int(record.created)) * 1000) + 0.0
+        records.append(record)
+    return records
+
+
+def bench_formatter(records: int) -> dict:
+    """
+    Measure records/sec of ColoredFormatter.format against BaselineFormatter, and check the output is identical.
+
+    Args:
+        records (int): Count of records to format.
+
+    Returns:
+        dict: records/sec of the baseline and the current formatter.
+    """
+    items = _make_records(records)
+    result = {}
+    outputs = {}
+    for name, formatter in (('baseline', BaselineFormatter()), ('current', ColoredFormatter())):
+        fmt = formatter.format
+        start = time.perf_counter()
+        outputs[name] = [fmt(r) for r in items]
+        result[name] = records / (time.perf_counter() - start)
+    result['identical'] = outputs['baseline'] == outputs['current']
+    return result
+
+
+def bench_caller_latency(tmp_dir: str, records: int, queued: bool, console: bool = False) -> dict:
+    """
+    Measure the time spent inside logger.info by the calling thread.
+
+    Args:
+        tmp_dir (str): Directory for the plain and HTML log files.
+        records (int): Count of records to log.
+        queued (bool): Whether to use the background writer (get_logger(queued=True)).
+        console (bool, optional): Whether to log to the console as well. Default is False.
+
+    Returns:
+        dict: Mean/p50/p99/max latency per call in microseconds, and the total time including the final drain.
+    """
+    tag = 'queued' if queued else 'direct'
+    logger = get_logger(
+        f'bench-{tag}', console=console,
+        filename=os.path.join(tmp_dir, f'{tag}.log'),
+        html=os.path.join(tmp_dir, f'{tag}.html'),
+        queued=queued)
+    latencies = [0.0] * records
+    clock = time.perf_counter
+    start = clock()
+    for i in range(records):
+        t0 = clock()
+        logger.info('benchmark record %d with some payload %s', i, tag)
+        latencies[i] = clock() - t0
+    caller_elapsed = clock() - start
+    for handler in logger.handlers:
+        writer = getattr(handler, 'writer', None)
+        if writer is not None:
+            writer.stop()
+        handler.flush()
+    total_elapsed = clock() - start
+    latencies.sort()
+    return {
+        'mode': tag,
+        'mean_us': caller_elapsed / records * 1e6,
+        'p50_us': latencies[records // 2] * 1e6,
+        'p99_us': latencies[int(records * 0.99)] * 1e6,
+        'max_us': latencies[-1] * 1e6,
+        'total_s': total_elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the logger package')
+    parser.add_argument('--records', type=int, default=100000, help='count of records to log')
+    parser.add_argument('--console', action='store_true', help='log to the console as well')
+    args = parser.parse_args()
+
+    r = bench_formatter(args.records)
+    print(f"format: baseline {r['baseline']:.0f} records/s, current {r['current']:.0f} records/s, "
+          f"speedup {r['current'] / r['baseline']:.2f}x, identical output: {r['identical']}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for queued in (False, True):
+            r = bench_caller_latency(tmp_dir, args.records, queued, args.console)
+            print(f"{r['mode']:>7}: caller mean {r['mean_us']:.2f}us, p50 {r['p50_us']:.2f}us, "
+                  f"p99 {r['p99_us']:.2f}us, max {r['max_us']:.0f}us, total with drain {r['total_s']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
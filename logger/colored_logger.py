@@ -3,9 +3,14 @@
 
 import logging
 import os
+import sys
 from types import MethodType
 
-from .formatter import ColoredFormatter, HTMLFormatter
+from .formatter import ColoredFormatter, HTMLFormatter, JSONFormatter
+from .handlers import (
+    BatchFileHandler, BatchStreamHandler, HTMLRollingFileHandler, NonBlockingQueueHandler, ProcessQueueHandler,
+    QueueWriter, RollingFileHandler)
+from .sampling import SamplingRule
 
 
 def create_directory(filename: str):
@@ -23,6 +28,9 @@ def create_directory(filename: str):
         os.makedirs(dirname)
 
 
+_INTERNAL_FILES = {logging.addLevelName.__code__.co_filename, create_directory.__code__.co_filename}
+
+
 class ColoredLogger(logging.Logger):
     # Additional Level
     LOGGING_SYSTEM = 25  # Between INFO and WARNING
@@ -30,24 +38,158 @@ class ColoredLogger(logging.Logger):
     logging.addLevelName(LOGGING_SYSTEM, 'SYSTEM')
     logging.addLevelName(LOGGING_NOTICE, 'NOTICE')
 
+    # 按logger名称和level配置的采样/限流规则，子logger继承父logger的规则
+    _sampling_rules: dict[str, dict[int, SamplingRule]] = {}
+    _sampling_version = 0
+
     def __init__(self, name: str, level: int | str = logging.NOTSET):
         super().__init__(name, level=level)
+        self._rule_cache = (-1, {})
+
+    @staticmethod
+    def configure_sampling(
+            name: str, level: int | str, rate: float | None = None, burst: int = 1,
+            sample: float | None = None, report_interval: float = 60.0):
+        """
+        Rate limit and/or sample the records of a level, per call site, for the logger and its children.
+
+        A suppressed call returns before the record is created, so the message is never formatted.
+        The counts of suppressed records are logged at the same level every report_interval seconds.
+
+        Args:
+            name (str): The name of the logger, '' for the root logger.
+            level (int | str): The level of the records to limit, e.g. logging.DEBUG or 'INFO'.
+            rate (float, optional): Max records per second per call site, None for no rate limit.
+            burst (int, optional): Max records allowed at once by the rate limit. Default is 1.
+            sample (float, optional): Probability in [0, 1] to keep a record, None for no sampling.
+            report_interval (float, optional): Seconds between two reports of the suppressed counts.
+        """
+        level = logging._checkLevel(level)
+        rules = dict(ColoredLogger._sampling_rules)
+        rules[name] = {**rules.get(name, {}), level: SamplingRule(rate, burst, sample, report_interval)}
+        ColoredLogger._sampling_rules = rules
+        ColoredLogger._sampling_version += 1
+
+    @staticmethod
+    def clear_sampling(name: str | None = None):
+        """
+        Remove the sampling rules of a logger, or all the rules if name is None.
+
+        Args:
+            name (str, optional): The name of the logger.
+        """
+        if name is None:
+            ColoredLogger._sampling_rules = {}
+        else:
+            ColoredLogger._sampling_rules = {k: v for k, v in ColoredLogger._sampling_rules.items() if k != name}
+        ColoredLogger._sampling_version += 1
+
+    def _sampling_rule(self, level: int) -> SamplingRule | None:
+        version, cache = self._rule_cache
+        if version != ColoredLogger._sampling_version:
+            version, cache = ColoredLogger._sampling_version, {}
+            self._rule_cache = (version, cache)
+        if level in cache:
+            return cache[level]
+        rule, name = None, self.name
+        while True:
+            rule = ColoredLogger._sampling_rules.get(name, {}).get(level)
+            if rule is not None or not name:
+                break
+            name = name.rpartition('.')[0]
+        cache[level] = rule
+        return rule
+
+    def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1):
+        rule = self._sampling_rule(level) if ColoredLogger._sampling_rules else None
+        if rule is not None:
+            # 只取调用点的文件和行号，比findCaller便宜得多
+            frame = sys._getframe(1)
+            while frame.f_back is not None and frame.f_code.co_filename in _INTERNAL_FILES:
+                frame = frame.f_back
+            if not rule.allow((frame.f_code.co_filename, frame.f_lineno)):
+                # 一直被限流的调用点也要按时报告，不能等到下一条放行的记录
+                self._report_suppressed(rule, level)
+                return
+        # 多出来的这一层栈帧不能算作调用方
+        super()._log(level, msg, args, exc_info, extra, stack_info, stacklevel + 1)
+        if rule is not None:
+            self._report_suppressed(rule, level)
+
+    def _report_suppressed(self, rule: SamplingRule, level: int):
+        for (filename, lineno), count in rule.pop_report().items():
+            super()._log(level, '%d records suppressed at %s:%d in the last %ss',
+                         (count, filename, lineno, rule.report_interval))
 
     def system(self, message, *args, **kws):
         if self.isEnabledFor(ColoredLogger.LOGGING_SYSTEM):
+            kws['stacklevel'] = kws.get('stacklevel', 1) + 1
             self._log(ColoredLogger.LOGGING_SYSTEM, message, args, **kws)
 
     def notice(self, message, *args, **kws):
         if self.isEnabledFor(ColoredLogger.LOGGING_NOTICE):
+            kws['stacklevel'] = kws.get('stacklevel', 1) + 1
             self._log(ColoredLogger.LOGGING_NOTICE, message, args, **kws)
 
+    @staticmethod
+    def create_handlers(
+            module_name: str = None,
+            console: bool = True,
+            filename: str | None = None,
+            html: str | None = None,
+            batched: bool = False,
+            json_lines: bool = False,
+            max_bytes: int = 0,
+            when: str | None = None,
+            backup_count: int = 0,
+            compress: bool = True) -> list[logging.Handler]:
+        """
+        Create the console, file and HTML handlers with their formatters, see 'get_logger' for the arguments.
+
+        Args:
+            batched (bool, optional): Whether the handlers leave flushing to a 'QueueWriter'. Default is False.
+
+        Returns:
+            list[logging.Handler]: The handlers.
+        """
+        stream_cls = BatchStreamHandler if batched else logging.StreamHandler
+        file_cls = BatchFileHandler if batched else logging.FileHandler
+        rolling = {'max_bytes': max_bytes, 'when': when, 'backup_count': backup_count,
+                   'compress': compress, 'batched': batched} if max_bytes or when else None
+        formatter_cls = JSONFormatter if json_lines else ColoredFormatter
+        handlers = []
+        if console:
+            ch = stream_cls()
+            ch.setFormatter(formatter_cls(module_name=module_name))
+            handlers.append(ch)
+
+        if filename:
+            create_directory(filename)
+            fh = RollingFileHandler(filename, **rolling) if rolling else file_cls(filename)
+            fh.setFormatter(formatter_cls(module_name=module_name))
+            handlers.append(fh)
+
+        if html:
+            create_directory(html)
+            hh = HTMLRollingFileHandler(html, **rolling) if rolling else file_cls(html)
+            hh.setFormatter(HTMLFormatter(module_name=module_name))
+            handlers.append(hh)
+        return handlers
+
     @staticmethod
     def get_logger(
             name: str,
             module_name: str = None,
             console: bool = True,
             filename: str | None = None,
-            html: str | None = None) -> logging.Logger:
+            html: str | None = None,
+            queued: bool = False,
+            json_lines: bool = False,
+            max_bytes: int = 0,
+            when: str | None = None,
+            backup_count: int = 0,
+            compress: bool = True,
+            aggregator_queue=None) -> logging.Logger:
         """
         Get a 'ColoredLogger' instance with configured handlers and formatters.
 
@@ -61,6 +203,19 @@ class ColoredLogger(logging.Logger):
             console (bool, optional): Whether to enable the console handler. Default is True.
             filename (str, optional): The name of the log file. If specified, a file handler will be created.
             html (str, optional): The name of the HTML file. If specified, an HTML file handler will be created.
+            queued (bool, optional): Whether to hand the records to a background writer thread through a queue,
+                so the caller never formats or writes the records itself. Default is False.
+            json_lines (bool, optional): Whether to write JSON lines (see 'JSONFormatter') instead of the colored
+                text to the console and the log file. The HTML file is not affected. Default is False.
+            max_bytes (int, optional): Rotate the log file and the HTML file when they would grow over this size.
+                Default is 0, no size based rotation.
+            when (str, optional): Rotate the log file and the HTML file by time, 'S'/'M'/'H'/'D' or 'midnight'.
+                Default is None, no time based rotation.
+            backup_count (int, optional): Count of rotated files to keep, 0 to keep all. Default is 0.
+            compress (bool, optional): Whether to gzip the rotated files in background. Default is True.
+            aggregator_queue (multiprocessing.Queue, optional): The queue of a 'LogAggregator'. If specified, the
+                records are sent to the aggregator process, which writes all the outputs, and the output
+                arguments above are ignored.
 
         Returns:
             logging.Logger: A configured 'ColoredLogger' instance.
@@ -78,22 +233,22 @@ class ColoredLogger(logging.Logger):
             logger.notice = MethodType(ColoredLogger.notice, logger)
 
         if len(logger.handlers) == 0:
-            if console:
-                ch = logging.StreamHandler()
-                ch.setFormatter(ColoredFormatter(module_name=module_name))
-                logger.addHandler(ch)
-
-            if filename:
-                create_directory(filename)
-                fh = logging.FileHandler(filename)
-                fh.setFormatter(ColoredFormatter(module_name=module_name))
-                logger.addHandler(fh)
-
-            if html:
-                create_directory(html)
-                hh = logging.FileHandler(html)
-                hh.setFormatter(HTMLFormatter(module_name=module_name))
-                logger.addHandler(hh)
+            if aggregator_queue is not None:
+                # 由LogAggregator进程统一写文件，这里只负责发送
+                handlers = [ProcessQueueHandler(aggregator_queue)]
+            else:
+                handlers = ColoredLogger.create_handlers(
+                    module_name=module_name, console=console, filename=filename, html=html,
+                    batched=queued, json_lines=json_lines, max_bytes=max_bytes, when=when,
+                    backup_count=backup_count, compress=compress)
+            if queued and handlers and aggregator_queue is None:
+                # 写入和格式化都放到后台线程，调用方只负责入队
+                writer = QueueWriter(handlers)
+                qh = NonBlockingQueueHandler(writer.queue)
+                qh.writer = writer
+                handlers = [qh]
+            for handler in handlers:
+                logger.addHandler(handler)
 
         return logger
 
@@ -103,7 +258,14 @@ def get_logger(
         module_name: str = None,
         console: bool = True,
         filename: str | None = None,
-        html: str | None = None) -> logging.Logger | ColoredLogger:
+        html: str | None = None,
+        queued: bool = False,
+        json_lines: bool = False,
+        max_bytes: int = 0,
+        when: str | None = None,
+        backup_count: int = 0,
+        compress: bool = True,
+        aggregator_queue=None) -> logging.Logger | ColoredLogger:
     """
     Get a 'ColoredLogger' instance with configured handlers and formatters.
     :param name:  The name of the logger.
@@ -111,8 +273,17 @@ def get_logger(
     :param console: whether print to console
     :param filename: save plain log to this file
     :param html: save html log to this file
+    :param queued: format and write the records in a background thread
+    :param json_lines: write JSON lines instead of colored text to the console and the log file
+    :param max_bytes: rotate the log and html files by size
+    :param when: rotate the log and html files by time, 'S'/'M'/'H'/'D' or 'midnight'
+    :param backup_count: count of rotated files to keep, 0 to keep all
+    :param compress: gzip the rotated files in background
+    :param aggregator_queue: send the records to the LogAggregator process owning this queue
     :return:
     """
     return ColoredLogger.get_logger(
         name=name, module_name=module_name,
-        console=console, filename=filename, html=html)
+        console=console, filename=filename, html=html, queued=queued,
+        json_lines=json_lines, max_bytes=max_bytes, when=when,
+        backup_count=backup_count, compress=compress, aggregator_queue=aggregator_queue)
@@ -1,9 +1,28 @@
 #!/usr/bin/env python
 # coding=utf-8
-import asyncio
 import logging
 import os.path
+import sys
 import threading
+import time
+
+
+def current_task_info() -> str:
+    """
+    Get the id of the current asyncio task as 'a-<id>', or of the current thread as 't-<ident>'.
+
+    Returns:
+        str: The task info used in the log records.
+    """
+    # asyncio没有被导入的话不可能有运行中的loop，不需要为此导入asyncio
+    asyncio = sys.modules.get('asyncio')
+    # _get_running_loop不会抛出RuntimeError，比current_task()的try/except便宜
+    loop = asyncio._get_running_loop() if asyncio is not None else None
+    if loop is not None:
+        task = asyncio.current_task(loop)
+        if task is not None:
+            return f'a-{id(task)}'
+    return f't-{threading.get_ident()}'
 
 
 # 基础配置
@@ -37,6 +56,11 @@ class ColoredFormatter(logging.Formatter):
         """
         super().__init__(*args, **kwargs)
         self.module_name = module_name
+        # caches for the hot path of format()
+        self._level_prefixes = {}
+        self._file_stems = {}
+        self._module_stem = os.path.splitext(module_name)[0] if module_name else None
+        self._time_cache = (None, None)
 
     def colored_level(self, levelname):
         """
@@ -52,6 +76,45 @@ class ColoredFormatter(logging.Formatter):
                f'[{levelname}]' \
                f'{ColoredFormatter.COLORS["RESET"]}'
 
+    def formatTime(self, record, datefmt=None):
+        """
+        Format the creation time of the record, same as logging.Formatter.formatTime,
+        but the strftime part is reused for all the records within the same second.
+
+        Args:
+            record (logging.LogRecord): The log record.
+            datefmt (str, optional): The strftime format, default_time_format is used if not given.
+
+        Returns:
+            str: The formatted time.
+        """
+        key = (int(record.created), datefmt)
+        cached_key, s = self._time_cache
+        if cached_key != key:
+            s = time.strftime(datefmt or self.default_time_format, self.converter(record.created))
+            # 单次赋值元组，多线程下也不会读到不一致的key和值
+            self._time_cache = (key, s)
+        if datefmt or not self.default_msec_format:
+            return s
+        return self.default_msec_format % (s, record.msecs)
+
+    def file_stem(self, record):
+        """
+        Get the file name shown in the record: the module name if given, otherwise the cached stem of record.filename.
+
+        Args:
+            record (logging.LogRecord): The log record.
+
+        Returns:
+            str: The file name without extension.
+        """
+        fn = self._module_stem
+        if fn is None:
+            fn = self._file_stems.get(record.filename)
+            if fn is None:
+                fn = self._file_stems[record.filename] = os.path.splitext(record.filename)[0]
+        return fn
+
     def format(self, record):
         """
         Format the log record into a string representation.
@@ -62,30 +125,19 @@ class ColoredFormatter(logging.Formatter):
         Returns:
             str: The formatted log record.
         """
-        level_name = record.levelname
         record.message = record.getMessage()
         record.asctime = self.formatTime(record, self.datefmt)
 
-        # for tid
-        try:
-            task = asyncio.current_task()
-            if task is None:
-                task_info = f't-{threading.current_thread().ident}'
-            else:
-                task_info = f'a-{id(task)}'
-        except RuntimeError:
-            task_info = f't-{threading.current_thread().ident}'
+        # for tid, may be captured by the caller thread already (see handlers.NonBlockingQueueHandler)
+        task_info = getattr(record, 'task_info', None) or current_task_info()
+
+        level = self._level_prefixes.get(record.levelname)
+        if level is None:
+            level = self._level_prefixes[record.levelname] = self.colored_level(record.levelname)
 
-        filename = self.module_name if self.module_name else record.filename
-        fn, _ = os.path.splitext(filename)
+        fn = self.file_stem(record)
 
-        msg = f'[{record.asctime}]' \
-              f'{self.colored_level(level_name)}' \
-              f'[{record.process}]' \
-              f'[{task_info}]' \
-              f'[{fn}]' \
-              f'  {record.message}'
-        return msg
+        return f'[{record.asctime}]{level}[{record.process}][{task_info}][{fn}]  {record.message}'
 
 
 class HTMLFormatter(ColoredFormatter):
@@ -133,3 +185,82 @@ class HTMLFormatter(ColoredFormatter):
         msg = super().format(record)
         return msg + '<br>'
 
+
+class JSONFormatter(ColoredFormatter):
+    """
+    A logging formatter which writes each record as a single JSON line, for tools that parse the logs.
+
+    It keeps the same fields as ColoredFormatter: time, level (including SYSTEM/NOTICE), pid,
+    task ('a-'/'t-' task info), file and message. Attributes given by 'extra=' are passed through,
+    and the formatted exception is added as 'exc_info' if any.
+    orjson is used as the encoder if installed, otherwise a compact json.JSONEncoder.
+    """
+    # 标准LogRecord的属性，以及formatter/handler加上的属性，其余的都算作extra
+    RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+        'message', 'asctime', 'task_info', 'taskName'}
+
+    _encode = None
+
+    @staticmethod
+    def _encoder():
+        """
+        The encode function, orjson if installed otherwise json, chosen and cached on first use.
+        They are not imported at module level: orjson alone imports uuid/zoneinfo/enum.
+        """
+        encode = JSONFormatter._encode
+        if encode is None:
+            try:
+                import orjson
+                encode = lambda obj: orjson.dumps(obj, default=str).decode()  # noqa: E731
+            except ImportError:  # optional, the json module is used if not installed
+                import json
+                encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+            JSONFormatter._encode = encode
+        return encode
+
+    @staticmethod
+    def encode(obj: dict) -> str:
+        """
+        Encode a dict into a JSON string.
+
+        Args:
+            obj (dict): The object to encode, values not supported by JSON are converted by str().
+
+        Returns:
+            str: The JSON string.
+        """
+        return JSONFormatter._encoder()(obj)
+
+    def format(self, record):
+        """
+        Format the log record into a JSON line.
+
+        Args:
+            record (logging.LogRecord): The log record to format.
+
+        Returns:
+            str: The JSON line without the trailing newline.
+        """
+        record.message = record.getMessage()
+        record.asctime = self.formatTime(record, self.datefmt)
+        task_info = getattr(record, 'task_info', None) or current_task_info()
+
+        fn = self.file_stem(record)
+
+        obj = {
+            'time': record.asctime,
+            'level': record.levelname,
+            'pid': record.process,
+            'task': task_info,
+            'file': fn,
+            'message': record.message,
+        }
+        reserved = self.RESERVED_ATTRS
+        for key, value in record.__dict__.items():
+            if key not in reserved and key not in obj:
+                obj[key] = value
+        if record.exc_info:
+            obj['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            obj['exc_info'] = record.exc_text
+        return self.encode(obj)
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+# coding=utf-8
+import atexit
+import copy
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+
+from .formatter import current_task_info
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """
+    A StreamHandler which does not flush after each record.
+    Flushing is left to the owner (see QueueWriter), so a batch of records costs a single flush.
+    """
+
+    def emit(self, record):
+        """
+        Write the formatted record to the stream without flushing.
+
+        Args:
+            record (logging.LogRecord): The log record to write.
+        """
+        try:
+            msg = self.format(record)
+            self.stream.write(msg + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class BatchFileHandler(logging.FileHandler):
+    """
+    A FileHandler which does not flush after each record, see BatchStreamHandler.
+    """
+
+    def emit(self, record):
+        """
+        Open the file if needed and write the formatted record without flushing.
+
+        Args:
+            record (logging.LogRecord): The log record to write.
+        """
+        if self.stream is None:
+            self.stream = self._open()
+        BatchStreamHandler.emit(self, record)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler which only puts the record into an unbounded queue.
+
+    Formatting and IO are done by the QueueWriter thread. The caller only resolves the message
+    (so later changes of the args do not leak into the log) and captures the task info,
+    which can not be known in the writer thread.
+    """
+
+    def prepare(self, record):
+        """
+        Prepare the record for the writer thread.
+
+        Args:
+            record (logging.LogRecord): The log record to enqueue.
+
+        Returns:
+            logging.LogRecord: A copy of the record, with message resolved and task_info captured.
+        """
+        # 和logging.handlers.QueueHandler一样修改副本，不影响同一个logger上的其它handler
+        record = copy.copy(record)
+        record.task_info = current_task_info()
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+class ProcessQueueHandler(NonBlockingQueueHandler):
+    """
+    A QueueHandler which sends the records to a 'LogAggregator' process through a multiprocessing queue.
+    The exception is formatted here, as tracebacks can not be pickled.
+    """
+
+    def prepare(self, record):
+        """
+        Prepare the record to be pickled.
+
+        Args:
+            record (logging.LogRecord): The log record to send.
+
+        Returns:
+            logging.LogRecord: A copy of the record, with message and exception text resolved.
+        """
+        record = super().prepare(record)
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class QueueWriter:
+    """
+    Background writer thread which drains a queue and passes the records to its handlers in batches.
+
+    The handlers are flushed when the queue runs empty, or at least every flush_interval seconds
+    under continuous load. A None in the queue stops the writer. The writer is stopped at exit
+    and every queued record is written before that.
+    """
+
+    def __init__(
+            self, handlers: list[logging.Handler], flush_interval: float = 0.5, batch_size: int = 512,
+            record_queue=None):
+        """
+        Args:
+            handlers (list[logging.Handler]): The handlers to write the records to.
+            flush_interval (float, optional): Max seconds between two flushes under load. Default is 0.5.
+            batch_size (int, optional): Max count of records handled between two checks of the flush time.
+            record_queue (optional): The queue to drain, e.g. a multiprocessing.Queue. A new SimpleQueue if None.
+        """
+        self.queue = queue.SimpleQueue() if record_queue is None else record_queue
+        self.handlers = handlers
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='QueueWriter', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        get, handlers = self.queue.get, self.handlers
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            try:
+                batch = [get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            drained = False
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(get(block=False))
+                except queue.Empty:
+                    drained = True
+                    break
+            for record in batch:
+                if record is None:
+                    stopping = True
+                    continue
+                for handler in handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            now = time.monotonic()
+            if drained or stopping or now - last_flush >= self.flush_interval:
+                for handler in handlers:
+                    handler.flush()
+                last_flush = now
+
+    def join(self, timeout: float | None = None):
+        """
+        Wait for the writer thread to end, after a None is put into the queue by stop() or by another process.
+
+        Args:
+            timeout (float, optional): Max seconds to wait, None to wait until the thread ends.
+        """
+        self._thread.join(timeout)
+
+    def stop(self):
+        """
+        Write out the queued records, stop the thread and close the handlers. Safe to call more than once.
+        """
+        with self._lock:
+            if not self._thread.is_alive():
+                return
+            self.queue.put(None)
+            self._thread.join()
+            for handler in self.handlers:
+                handler.flush()
+                handler.close()
+        atexit.unregister(self.stop)
+
+
+_STOP = object()
+
+
+class _Compressor:
+    """
+    A single background thread which compresses the rotated files and removes the old backups,
+    so a rotation never blocks the logging thread. Pending jobs are finished at exit.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, rotated: str, compress: bool, pattern: re.Pattern, backup_count: int):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='LogCompressor', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+        self.queue.put((rotated, compress, pattern, backup_count))
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is _STOP:
+                break
+            try:
+                self._process(*job)
+            except OSError as e:
+                print(f'Failed to compress or prune {job[0]}: {e}', file=sys.stderr)
+
+    @staticmethod
+    def _process(rotated: str, compress: bool, pattern: re.Pattern, backup_count: int):
+        if compress and os.path.exists(rotated):
+            tmp = rotated + '.gz.tmp'
+            with open(rotated, 'rb') as src, gzip.open(tmp, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(tmp, rotated + '.gz')
+            os.remove(rotated)
+        if backup_count > 0:
+            dirname = os.path.dirname(rotated)
+            backups = [
+                os.path.join(dirname, name) for name in os.listdir(dirname) if pattern.match(name)]
+            backups.sort(key=os.path.getmtime)
+            for path in backups[:-backup_count]:
+                os.remove(path)
+
+    def stop(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self.queue.put(_STOP)
+                self._thread.join()
+        atexit.unregister(self.stop)
+
+
+_compressor = _Compressor()
+
+
+class RollingFileHandler(logging.FileHandler):
+    """
+    A FileHandler which rotates the file by size and/or by time.
+
+    The rotated file is renamed to '<stem>.<YYYYmmdd-HHMMSS><ext>' next to the log file, then gzip compressed
+    and the backups over backup_count removed on a background thread.
+    Set batched to True when used by QueueWriter, which takes care of flushing.
+    """
+    header = ''
+    """written at the beginning of every new file"""
+    footer = ''
+    """written at the end of every rotated file"""
+
+    WHEN_SECONDS = {'S': 1, 'M': 60, 'H': 3600, 'D': 86400}
+
+    def __init__(
+            self, filename: str, max_bytes: int = 0, when: str | None = None, interval: int = 1,
+            backup_count: int = 0, compress: bool = True, batched: bool = False,
+            mode: str = 'a', encoding: str | None = 'utf-8'):
+        """
+        Args:
+            filename (str): The name of the log file.
+            max_bytes (int, optional): Rotate when the file would grow over this size, 0 for no size limit.
+            when (str, optional): Rotate by time, one of 'S', 'M', 'H', 'D' (every interval units)
+                or 'midnight'. None for no time based rotation.
+            interval (int, optional): Count of 'when' units between two rotations. Default is 1.
+            backup_count (int, optional): Count of rotated files to keep, 0 to keep all of them.
+            compress (bool, optional): Whether to gzip the rotated files. Default is True.
+            batched (bool, optional): Whether to leave flushing to the caller. Default is False.
+            mode (str, optional): The open mode of the log file. Default is 'a'.
+            encoding (str, optional): The encoding of the log file. Default is 'utf-8'.
+        """
+        when = when.upper() if when else None
+        if when is not None and when != 'MIDNIGHT' and when not in self.WHEN_SECONDS:
+            raise ValueError(f'Invalid rollover interval specified: {when}')
+        self.max_bytes = max_bytes
+        self.when = when
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.batched = batched
+        self._size = 0
+        stem, ext = os.path.splitext(os.path.basename(filename))
+        self._backup_pattern = re.compile(
+            re.escape(stem) + r'\.\d{8}-\d{6}(-\d+)?' + re.escape(ext) + r'(\.gz)?$')
+        super().__init__(filename, mode=mode, encoding=encoding)
+        self.rollover_at = self._next_rollover(time.time())
+
+    def _open(self):
+        stream = super()._open()
+        if self.header and stream.tell() == 0:
+            stream.write(self.header)
+        self._size = stream.tell()
+        return stream
+
+    def _next_rollover(self, now: float) -> float | None:
+        if self.when is None:
+            return None
+        if self.when == 'MIDNIGHT':
+            t = time.localtime(now)
+            return time.mktime((t.tm_year, t.tm_mon, t.tm_mday + self.interval, 0, 0, 0, 0, 0, -1))
+        return now + self.WHEN_SECONDS[self.when] * self.interval
+
+    def _rotated_name(self) -> str:
+        stem, ext = os.path.splitext(self.baseFilename)
+        name = f'{stem}.{time.strftime("%Y%m%d-%H%M%S")}'
+        dest, i = name + ext, 1
+        while os.path.exists(dest) or os.path.exists(dest + '.gz'):
+            dest = f'{name}-{i}{ext}'
+            i += 1
+        return dest
+
+    def doRollover(self):
+        """
+        Close the current file (with the footer), rename it and hand it to the background compressor,
+        then start a new file (with the header).
+        """
+        if self.stream:
+            if self.footer:
+                self.stream.write(self.footer)
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename):
+            rotated = self._rotated_name()
+            os.rename(self.baseFilename, rotated)
+            _compressor.submit(rotated, self.compress, self._backup_pattern, self.backup_count)
+        self.rollover_at = self._next_rollover(time.time())
+        self.stream = self._open()
+
+    def emit(self, record):
+        """
+        Rotate the file if needed, then write the formatted record. Flush unless batched.
+
+        Args:
+            record (logging.LogRecord): The log record to write.
+        """
+        try:
+            msg = self.format(record) + self.terminator
+            size = len(msg.encode(self.encoding or 'utf-8', errors='replace')) if self.max_bytes else 0
+            if (self.max_bytes and self._size > len(self.header) and self._size + size > self.max_bytes) or \
+                    (self.rollover_at is not None and record.created >= self.rollover_at):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self._size += size
+            if not self.batched:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class HTMLRollingFileHandler(RollingFileHandler):
+    """
+    A RollingFileHandler for HTMLFormatter, every file (the rotated ones included) is an HTML document on its own.
+    """
+    header = '<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"></head>\n<body style="font-family: monospace">\n'
+    footer = '</body>\n</html>\n'
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# coding=utf-8
+import random
+import threading
+import time
+
+
+class SamplingRule:
+    """
+    Rate limit and/or probabilistic sampling of the records of one level, applied per call site.
+
+    Each call site (file and line of the logging call) gets its own token bucket of 'rate' records
+    per second with 'burst' capacity. The records passing the rate limit are then kept with probability
+    'sample'. The suppressed records are counted per call site and reported every report_interval seconds.
+    """
+
+    def __init__(
+            self, rate: float | None = None, burst: int = 1,
+            sample: float | None = None, report_interval: float = 60.0):
+        """
+        Args:
+            rate (float, optional): Max records per second per call site, None for no rate limit.
+            burst (int, optional): Max records allowed at once by the rate limit. Default is 1.
+            sample (float, optional): Probability in [0, 1] to keep a record, None for no sampling.
+            report_interval (float, optional): Seconds between two reports of the suppressed counts.
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.sample = sample
+        self.report_interval = report_interval
+        self._buckets = {}
+        self._suppressed = {}
+        self._last_report = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self, site: tuple[str, int]) -> bool:
+        """
+        Check whether a record from the call site should be kept, and count it if not.
+
+        Args:
+            site (tuple[str, int]): The file name and line number of the logging call.
+
+        Returns:
+            bool: True to keep the record.
+        """
+        keep = True
+        if self.rate is not None:
+            now = time.monotonic()
+            with self._lock:
+                tokens, last = self._buckets.get(site, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    keep = False
+                self._buckets[site] = (tokens, now)
+        if keep and self.sample is not None and random.random() >= self.sample:
+            keep = False
+        if not keep:
+            with self._lock:
+                self._suppressed[site] = self._suppressed.get(site, 0) + 1
+        return keep
+
+    def pop_report(self) -> dict[tuple[str, int], int]:
+        """
+        Get and reset the suppressed counts if the report interval has passed.
+
+        Returns:
+            dict: Suppressed counts by call site, empty if nothing to report yet.
+        """
+        now = time.monotonic()
+        if now - self._last_report < self.report_interval or not self._suppressed:
+            return {}
+        with self._lock:
+            report, self._suppressed = self._suppressed, {}
+            self._last_report = now
+        return report
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Indexed viewer for large logs written by ColoredFormatter, HTMLFormatter or JSONFormatter.
+
+A sparse index (timestamp -> byte offset of a record) is kept next to the log as '<log>.idx'.
+It is extended incrementally while the log grows, so only the new tail is scanned.
+Queries seek through the index to the start of the time range and read the file through mmap:
+
+    python -m logger.viewer index app.log
+    python -m logger.viewer query app.log --start "2025-01-01 10:00" --end "2025-01-01 11:00" --level ERROR
+    python -m logger.viewer serve app.html --port 8080
+"""
+import argparse
+import bisect
+import hashlib
+import html
+import json
+import mmap
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from .formatter import HTMLFormatter
+
+# 时间戳格式固定为 'YYYY-mm-dd HH:MM:SS,mmm'，可以直接按字符串比较大小
+RECORD_PATTERN = re.compile(
+    rb'\[(?P<time>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3})\]'
+    rb'(?:\x1b\[[\d;]*m\[(?P<level>\w+)\]\x1b\[[\d;]*m|<span[^>]*>(?P<hlevel>\w+)</span>)'
+    rb'\[(?P<pid>\d+)\]\[(?P<task>[^\]]+)\]\[(?P<file>[^\]]*)\]  ')
+JSON_PATTERN = re.compile(
+    rb'\{"time":"(?P<time>[^"]+)","level":"(?P<level>\w+)","pid":(?P<pid>\d+),'
+    rb'"task":"(?P<task>[^"]+)","file":"(?P<file>[^"]*)"')
+ANSI_PATTERN = re.compile(r'\x1b\[[\d;]*m')
+# 文件标识只取第一行的这么多字节
+HEAD_BYTES = 4096
+
+
+class LogRecordView:
+    """A record read from the log, the message may span several lines"""
+    __slots__ = ('offset', 'time', 'level', 'pid', 'task', 'file', 'text')
+
+    def __init__(self, offset: int, match: re.Match, text: bytes):
+        self.offset = offset
+        self.time = match['time'].decode()
+        self.level = (match['level'] or match.groupdict().get('hlevel') or b'').decode()
+        self.pid = int(match['pid'])
+        self.task = match['task'].decode()
+        self.file = match['file'].decode()
+        self.text = text.decode('utf-8', errors='replace')
+
+
+def _match_record(line: bytes) -> re.Match | None:
+    if line.startswith(b'{'):
+        return JSON_PATTERN.match(line)
+    return RECORD_PATTERN.match(line)
+
+
+class LogIndex:
+    """
+    Sparse index of a log file: the timestamp and offset of the first record after every 'step' bytes.
+    """
+
+    def __init__(self, path: str, step: int = 1 << 20):
+        """
+        :param path: the log file
+        :param step: bytes between two index entries
+        """
+        self.path = path
+        self.index_path = path + '.idx'
+        self.step = step
+        self.size = 0
+        self.identity: list | None = None
+        self.times: list[str] = []
+        self.offsets: list[int] = []
+
+    def file_identity(self) -> list:
+        """
+        Identity of the log file: device, inode and the hash of the first line.
+        It changes when the log is rotated or rewritten, even if the new file is already larger than the indexed size.
+        """
+        with open(self.path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            head = f.read(HEAD_BYTES)
+        nl = head.find(b'\n')
+        first_line = head[:nl + 1] if nl >= 0 else b''
+        return [st.st_dev, st.st_ino, hashlib.sha1(first_line).hexdigest()]
+
+    def load(self) -> 'LogIndex':
+        """Load the index file if any and extend it to the current end of the log"""
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get('step') == self.step and data.get('identity') == self.file_identity()
+                    and data.get('size', 0) <= os.path.getsize(self.path)):
+                self.size = data['size']
+                self.identity = data['identity']
+                self.times = [e[0] for e in data['entries']]
+                self.offsets = [e[1] for e in data['entries']]
+        self.update()
+        return self
+
+    def save(self):
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump({'step': self.step, 'size': self.size, 'identity': self.identity,
+                       'entries': list(zip(self.times, self.offsets))}, f)
+
+    def update(self) -> int:
+        """
+        Scan the part of the log written after the last update, and save the index if it changed.
+        The log is only read at every 'step' bytes, so the cost is about one line per step.
+        :return: count of new index entries
+        """
+        size = os.path.getsize(self.path)
+        identity = self.file_identity()
+        if size < self.size or identity != self.identity:
+            # 文件被截断、轮转或者重写了，重建索引
+            self.size, self.times, self.offsets = 0, [], []
+            self.identity = identity
+        if size == self.size:
+            return 0
+        added = 0
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            next_pos = self.offsets[-1] + self.step if self.offsets else 0
+            pos = max(self.size, next_pos)
+            # 只在完整的行上建索引，最后未写完的行留给下次
+            end = mm.rfind(b'\n', 0, size) + 1
+            while pos < end:
+                if pos > 0 and mm[pos - 1:pos] != b'\n':
+                    nl = mm.find(b'\n', pos, end)
+                    if nl < 0:
+                        break
+                    pos = nl + 1
+                line_end = mm.find(b'\n', pos, end)
+                if line_end < 0:
+                    break
+                m = _match_record(mm[pos:line_end])
+                if m is None:
+                    pos = line_end + 1
+                    continue
+                self.times.append(m['time'].decode())
+                self.offsets.append(pos)
+                added += 1
+                pos += self.step
+            self.size = end
+        if added:
+            self.save()
+        return added
+
+    def seek(self, start: str | None) -> int:
+        """
+        :param start: timestamp prefix like '2025-01-01 10:00'
+        :return: an offset at or before the first record not earlier than start
+        """
+        if not start or not self.times:
+            return 0
+        i = bisect.bisect_left(self.times, start) - 1
+        return self.offsets[i] if i >= 0 else 0
+
+
+def iter_records(
+        path: str, start: str | None = None, end: str | None = None,
+        levels: set[str] | None = None, pid: int | None = None, task: str | None = None,
+        offset: int | None = None, index: LogIndex | None = None):
+    """
+    Iterate the records in [start, end) matching the filters, reading the log through mmap.
+
+    :param path: the log file
+    :param start: timestamp prefix of the range start, like '2025-01-01 10:00', None for the beginning
+    :param end: timestamp prefix of the range end (exclusive), None for the end of the file
+    :param levels: level names to keep, None for all
+    :param pid: process id to keep, None for all
+    :param task: task info ('a-...'/'t-...') to keep, None for all
+    :param offset: start reading at this offset (a cursor returned in LogRecordView.offset) instead of seeking
+    :param index: the index to seek with, loaded if not given
+    :return: generator of LogRecordView
+    """
+    if offset is None:
+        index = index or LogIndex(path).load()
+        offset = index.seek(start)
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        pos = offset
+        current = None
+        while pos < size:
+            line_end = mm.find(b'\n', pos)
+            if line_end < 0:
+                line_end = size
+            line = mm[pos:line_end]
+            m = _match_record(line)
+            if m is None:
+                # 多行消息的后续行
+                if current is not None:
+                    current[2].append(line)
+                pos = line_end + 1
+                continue
+            if current is not None:
+                yield LogRecordView(current[0], current[1], b'\n'.join(current[2]))
+                current = None
+            ts = m['time'].decode()
+            if end and ts >= end:
+                # 时间只会小幅乱序（多进程写同一个文件），超出范围后就停止
+                return
+            if (not start or ts >= start) and \
+                    (levels is None or (m['level'] or m.groupdict().get('hlevel') or b'').decode() in levels) and \
+                    (pid is None or int(m['pid']) == pid) and \
+                    (task is None or m['task'].decode() == task):
+                current = (pos, m, [line])
+            pos = line_end + 1
+        if current is not None:
+            yield LogRecordView(current[0], current[1], b'\n'.join(current[2]))
+
+
+def render_page(records: list[LogRecordView], query: dict, next_offset: int | None) -> str:
+    """
+    Render a page of records as an HTML document.
+    :param records: the records of this page
+    :param query: the query parameters, used for the 'next' link
+    :param next_offset: cursor of the next page, None if this is the last page
+    :return: the HTML document
+    """
+    rows = []
+    for r in records:
+        if '<span' in r.text:
+            rows.append(r.text)  # HTMLFormatter的输出，原样展示
+        else:
+            color = HTMLFormatter.COLORS.get(r.level, 'black')
+            rows.append(f'<span style="color: {color}">{html.escape(ANSI_PATTERN.sub("", r.text))}</span><br>')
+    nav = ''
+    if next_offset is not None:
+        nav = f'<p><a href="?{html.escape(urlencode({**query, "offset": next_offset}))}">next page</a></p>'
+    return '<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"></head>\n' \
+           '<body style="font-family: monospace; white-space: pre-wrap">\n' + \
+           '\n'.join(rows) + f'\n{nav}\n</body>\n</html>\n'
+
+
+def query_page(path: str, query: dict, page_size: int = 500, index: LogIndex | None = None) -> str:
+    """
+    Render one page of the log for the query parameters start/end/level/pid/task/offset.
+    """
+    levels = set(query['level'].upper().split(',')) if query.get('level') else None
+    records, next_offset = [], None
+    for r in iter_records(
+            path, start=query.get('start'), end=query.get('end'), levels=levels,
+            pid=int(query['pid']) if query.get('pid') else None, task=query.get('task'),
+            offset=int(query['offset']) if query.get('offset') else None, index=index):
+        if len(records) == page_size:
+            next_offset = r.offset
+            break
+        records.append(r)
+    params = {k: v for k, v in query.items() if k != 'offset' and v}
+    return render_page(records, params, next_offset)
+
+
+def serve(path: str, host: str = '127.0.0.1', port: int = 8080, page_size: int = 500):
+    """
+    Serve a paginated HTML view of the log, e.g. http://127.0.0.1:8080/?start=2025-01-01 10:00&level=ERROR
+    """
+    index = LogIndex(path).load()
+    # 请求在不同的线程中处理，更新索引（列表和.idx文件）和在索引中查找都要互斥，读取日志本身不需要
+    index_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+            with index_lock:
+                index.update()
+                if not query.get('offset'):
+                    query['offset'] = str(index.seek(query.get('start')))
+            body = query_page(path, query, page_size).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    print(f'Serving {path} on http://{host}:{port}/')
+    ThreadingHTTPServer((host, port), Handler).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='logger.viewer', description='Indexed viewer for large log files')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_index = sub.add_parser('index', help='build or extend the index of a log file')
+    p_index.add_argument('file')
+    p_query = sub.add_parser('query', help='print the records of a time range')
+    p_query.add_argument('file')
+    p_serve = sub.add_parser('serve', help='serve a paginated HTML view')
+    p_serve.add_argument('file')
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, default=8080)
+    p_serve.add_argument('--page-size', type=int, default=500)
+    p_query.add_argument('--start', help="timestamp prefix, like '2025-01-01 10:00'")
+    p_query.add_argument('--end', help='timestamp prefix, exclusive')
+    p_query.add_argument('--level', help='comma separated level names, like ERROR,NOTICE')
+    p_query.add_argument('--pid', type=int)
+    p_query.add_argument('--task', help="task info, like 'a-140...' or 't-140...'")
+    p_query.add_argument('--limit', type=int, default=0, help='max records to print, 0 for no limit')
+    args = parser.parse_args()
+
+    if args.command == 'index':
+        index = LogIndex(args.file).load()
+        print(f'{len(index.offsets)} entries, {index.size} bytes indexed in {index.index_path}')
+    elif args.command == 'query':
+        levels = set(args.level.upper().split(',')) if args.level else None
+        for i, r in enumerate(iter_records(args.file, args.start, args.end, levels, args.pid, args.task)):
+            if args.limit and i >= args.limit:
+                break
+            print(r.text)
+    else:
+        serve(args.file, args.host, args.port, args.page_size)
+
+
+if __name__ == '__main__':
+    main()
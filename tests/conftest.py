@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 追加到sys.path末尾而不是放在最前面，避免numbers/crypt等目录遮蔽同名的标准库
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
@@ -0,0 +1,45 @@
+from files.docx2md import Manifest
+
+
+def _convert(manifest, src, out_md):
+    """模拟一次转换：写出 md 和 _images 目录并记录到清单"""
+    out_md.write_text(src.name, encoding="utf-8")
+    out_md.with_name(f"{out_md.stem}_images").mkdir(exist_ok=True)
+    manifest.record(src, out_md)
+
+
+def test_prune_keeps_output_shared_with_live_input(tmp_path):
+    # 非递归地分别转换 a/ 和 b/ 到同一个输出目录，两个 x.docx 都输出到 out/x.md
+    a, b, out = tmp_path / "a", tmp_path / "b", tmp_path / "out"
+    for d in (a, b, out):
+        d.mkdir()
+    a_x, b_x = a / "x.docx", b / "x.docx"
+    a_x.write_bytes(b"a")
+    b_x.write_bytes(b"b")
+    manifest = Manifest(out, "pandoc 3")
+    _convert(manifest, a_x, out / "x.md")
+    _convert(manifest, b_x, out / "x.md")
+
+    a_x.unlink()
+    assert manifest.prune(a, [], recursive=False) == [str(a_x)]
+    assert (out / "x.md").exists()
+    assert (out / "x_images").is_dir()
+    assert manifest.is_current(b_x, out / "x.md")
+
+    b_x.unlink()
+    assert manifest.prune(b, [], recursive=False) == [str(b_x)]
+    assert not (out / "x.md").exists()
+    assert not (out / "x_images").exists()
+
+
+def test_prune_ignores_sources_outside_the_scanned_root(tmp_path):
+    a, other, out = tmp_path / "a", tmp_path / "other", tmp_path / "out"
+    for d in (a, other, out):
+        d.mkdir()
+    src = other / "y.docx"
+    src.write_bytes(b"y")
+    manifest = Manifest(out, "pandoc 3")
+    _convert(manifest, src, out / "y.md")
+    src.unlink()
+    assert manifest.prune(a, [], recursive=True) == []
+    assert (out / "y.md").exists()
@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+from tmstat import work_time
+
+
+def test_write_xlsx_rejects_frame_over_the_row_limit(tmp_path):
+    # 加上表头正好多出一行
+    frame = pd.DataFrame({'a': range(work_time.XLSX_MAX_ROWS)})
+    with pytest.raises(ValueError, match='This sheet is too large'):
+        work_time.save_frame(frame, str(tmp_path / 'big.xlsx'), 'Summary', index=False)
+
+
+def test_write_xlsx_round_trip(tmp_path):
+    frame = pd.DataFrame({'name': ['a', None], 'n': [1.5, None]})
+    filename = str(tmp_path / 'small.xlsx')
+    assert work_time.save_frame(frame, filename, 'Summary', index=False)
+    back = pd.read_excel(filename, sheet_name='Summary')
+    assert back['name'].tolist()[0] == 'a'
+    assert back['n'].tolist()[0] == 1.5
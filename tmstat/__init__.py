@@ -0,0 +1,27 @@
+"""
+Work time statistics from badge records, needs pandas.
+"""
+import importlib
+
+_LAZY = {
+    'get_raw_data': '.work_time',
+    'write_single_day_summary': '.work_time',
+    'write_total_summary': '.work_time',
+    'filter_raw_data': '.work_time',
+    'read_raw_data_chunked': '.ingest',
+    'iter_raw_chunks': '.ingest',
+    'DailyStore': '.state',
+    'WorkCalendar': '.workcalendar',
+    'expand_inputs': '.batch',
+    'load_many': '.batch',
+    'generate_raw_records': '.synthetic',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    return value
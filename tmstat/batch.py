@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+并行读取多个文件/多个sheet的原始数据：每个(文件, sheet)在进程池中单独读取、过滤并按(name, date)汇总，
+主进程只合并各自的汇总结果，再交给write_single_day_summary按原来的groupby聚合
+"""
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+try:
+    from . import ingest, work_time
+    from .workcalendar import WorkCalendar
+except ImportError:
+    import ingest
+    import work_time
+    from workcalendar import WorkCalendar
+
+ALL_SHEETS = '*'
+# 没有sheet、总是流式读取的格式
+STREAM_SUFFIXES = ('.csv', '.txt', '.parquet', '.pq')
+# openpyxl能流式读取的Excel格式，.xls只能用read_excel整体读取
+XLSX_SUFFIXES = ('.xlsx', '.xlsm')
+
+
+def list_sheets(filename: str) -> list[str]:
+    if not filename.lower().endswith(XLSX_SUFFIXES):
+        with pd.ExcelFile(filename) as xls:
+            return list(xls.sheet_names)
+    import openpyxl
+    wb = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def expand_inputs(patterns: list[str], sheets: list[str]) -> list[tuple[str, str | None]]:
+    """
+    展开文件通配符和sheet列表
+    :param patterns: 文件名或通配符，例如 'data/2025-*.xlsx'
+    :param sheets: xlsx/xls的sheet名称，'*'表示所有sheet，csv/parquet忽略
+    :return: (文件, sheet)的列表，csv/parquet的sheet为None
+    """
+    files = []
+    for pattern in patterns:
+        matched = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matched:
+            raise FileNotFoundError(f'No file matches {pattern}')
+        files.extend(f for f in matched if f not in files)
+    tasks = []
+    for filename in files:
+        if filename.lower().endswith(STREAM_SUFFIXES):
+            tasks.append((filename, None))
+        elif ALL_SHEETS in sheets:
+            tasks.extend((filename, sheet) for sheet in list_sheets(filename))
+        else:
+            tasks.extend((filename, sheet) for sheet in sheets)
+    return tasks
+
+
+def load_task(filename: str, sheet_name: str | None, chunksize: int = 0, calendar: str = 'cn') -> tuple[pd.DataFrame, int]:
+    """
+    读取并过滤一个(文件, sheet)，在子进程中执行
+    :param filename: 原始数据文件
+    :param sheet_name: xlsx的sheet名称
+    :param chunksize: 大于0时xlsx也分块流式读取，csv/parquet总是流式读取，xls总是用read_excel读取
+    :param calendar: 工作日历的名称或文件路径
+    :return: 按(name, date)汇总后的name/date/start/end，以及过滤后的记录数
+    """
+    cal = WorkCalendar.load(calendar)
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in STREAM_SUFFIXES or (chunksize > 0 and ext in XLSX_SUFFIXES):
+        aggregator = ingest.DailyAggregator(cal)
+        for chunk in ingest.iter_raw_chunks(filename, sheet_name, chunksize or 100_000):
+            aggregator.add(chunk)
+        return aggregator.result(), aggregator.rows_kept
+    df = work_time.get_raw_data(filename=filename, sheet_name=sheet_name, calendar=cal)
+    # 只把汇总结果传回主进程，减少进程间传输的数据量
+    daily = df.groupby(['name', 'date'], as_index=False).agg(start=('start', 'min'), end=('end', 'max'))
+    return daily, len(df)
+
+
+def load_many(
+        tasks: list[tuple[str, str | None]], jobs: int | None = None, chunksize: int = 0,
+        calendar: str = 'cn', progress: bool = True) -> pd.DataFrame:
+    """
+    用进程池并行读取多个(文件, sheet)，合并成一个按(name, date)汇总的DataFrame
+    :param tasks: expand_inputs的结果
+    :param jobs: 进程数，None表示CPU核数，1表示在当前进程中顺序执行
+    :param chunksize: 见load_task
+    :param calendar: 工作日历的名称或文件路径
+    :param progress: 是否打印进度
+    :return: name/date/start/end，可以直接传给write_single_day_summary
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks)) or 1
+    start = time.perf_counter()
+    results, total_rows = [], 0
+
+    def report(done: int, task: tuple[str, str | None], rows: int):
+        if progress:
+            where = task[0] if task[1] is None else f'{task[0]}[{task[1]}]'
+            print(f'[{done}/{len(tasks)}] {where}: {rows}条有效记录，已用时{time.perf_counter() - start:.1f}s')
+
+    if jobs == 1:
+        for i, task in enumerate(tasks, 1):
+            daily, rows = load_task(*task, chunksize=chunksize, calendar=calendar)
+            results.append(daily)
+            total_rows += rows
+            report(i, task, rows)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(load_task, *task, chunksize=chunksize, calendar=calendar): task
+                       for task in tasks}
+            for i, future in enumerate(as_completed(futures), 1):
+                daily, rows = future.result()
+                results.append(daily)
+                total_rows += rows
+                report(i, futures[future], rows)
+    if progress:
+        print(f'共{len(tasks)}个文件/sheet，{total_rows}条有效记录，用时{time.perf_counter() - start:.1f}s')
+    if not results:
+        return ingest.DailyAggregator().result()
+    return pd.concat(results, ignore_index=True)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Benchmark of the vectorized daily/total summaries against the previous row-wise code, run in the tmstat directory with:
+
+    python benchmark.py --rows 10000000
+
+or the suite timing every stage on synthetic raw data, with the peak traced memory of each stage:
+
+    python benchmark.py --suite --sizes 10000,1000000,10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import ingest, synthetic, work_time
+except ImportError:
+    import ingest
+    import synthetic
+    import work_time
+
+# Excel单个sheet最多1048576行
+XLSX_MAX_ROWS = 1_048_575
+
+
+def make_records(rows: int, names: int = 5000, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic badge records in the format returned by get_raw_data: name, date, start, end
+
+    :param rows: count of records
+    :param names: count of employees
+    :param seed: random seed
+    :return:
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range('2024-01-01', periods=260)
+    start = rng.integers(7 * 3600, 11 * 3600, rows)
+    end = start + rng.integers(3600, 12 * 3600, rows)
+    return pd.DataFrame({
+        'name': pd.Series([f'emp{i:05d}' for i in range(names)]).to_numpy()[rng.integers(0, names, rows)],
+        'date': days.to_numpy()[rng.integers(0, len(days), rows)],
+        'start': pd.Timestamp('1900-01-01') + pd.to_timedelta(start, unit='s'),
+        'end': pd.Timestamp('1900-01-01') + pd.to_timedelta(np.minimum(end, 23 * 3600), unit='s'),
+    })
+
+
+def legacy_single_day_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """The previous write_single_day_summary: apply per row for hms and status"""
+    grouped = df.groupby(['name', 'date']).agg(
+        work_start=('start', 'min'),
+        work_end=('end', 'max')
+    ).reset_index()
+    grouped['duration'] = (grouped['work_end'] - grouped['work_start']).dt.total_seconds()
+    grouped['hms'] = grouped['duration'].apply(lambda x: str(timedelta(seconds=x)))
+    grouped['status'] = grouped.apply(work_time.calculate_status, axis=1)
+    grouped['date'] = grouped['date'].dt.strftime('%Y-%m-%d')
+    grouped['work_start'] = grouped['work_start'].dt.strftime('%H:%M:%S')
+    grouped['work_end'] = grouped['work_end'].dt.strftime('%H:%M:%S')
+    return grouped
+
+
+def legacy_total_summary(grouped: pd.DataFrame) -> pd.DataFrame:
+    """The previous write_total_summary: one lambda per status column"""
+    result = grouped.groupby('name').agg(
+        total_days=('date', 'nunique'),
+        half_days=('status', lambda x: (x == 'half').sum()),
+        valid_days=('status', lambda x: (x != 'half').sum()),
+        lack_days=('status', lambda x: (x == 'lack').sum()),
+        near_days=('status', lambda x: (x == 'near').sum()),
+        full_days=('status', lambda x: (x == 'full').sum()),
+        over_days=('status', lambda x: (x == 'over').sum()),
+    )
+    filtered = grouped[grouped['status'].isin(['lack', 'full', 'over'])]
+    avg_duration = filtered.groupby('name')['duration'].mean().round()
+    result['avg_dur'] = avg_duration
+    result['avg_hms'] = avg_duration.apply(lambda x: str(timedelta(seconds=x)))
+    valid = result['total_days'] - result['half_days']
+    result['lack_ratio'] = result['lack_days'] / valid
+    result['near_ratio'] = result['near_days'] / valid
+    result['ok_ratio'] = (result['full_days'] + result['over_days']) / valid
+    return result
+
+
+def measure(fn, *args, memory: bool = True):
+    """
+    Run fn twice: once for the time, and once under tracemalloc for the peak memory (numpy/pandas buffers included).
+
+    :return: result, elapsed seconds, peak MiB (None if memory is False)
+    """
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    if not memory:
+        return result, elapsed, None
+    del result
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        peak = tracemalloc.get_traced_memory()[1] / (1 << 20)
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_suite(sizes: list[int], xlsx_rows: int, memory: bool = True):
+    """
+    Time get_raw_data (xlsx, up to xlsx_rows), the chunked csv reader, filter_raw_data,
+    write_single_day_summary and write_total_summary on synthetic raw data of each size.
+    """
+    print(f'{"rows":>12} {"stage":<26} {"time(s)":>9} {"peak(MiB)":>10} {"rows/s":>14}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            raw = synthetic.generate_raw_records(rows)
+            stages = []
+            if rows <= min(xlsx_rows, XLSX_MAX_ROWS):
+                xlsx = os.path.join(tmp, f'raw_{rows}.xlsx')
+                work_time.save_frame(raw, xlsx, '原始数据-all', index=False)
+                stages.append(('get_raw_data (xlsx)', work_time.get_raw_data, xlsx))
+            csv = os.path.join(tmp, f'raw_{rows}.csv')
+            work_time.save_frame(raw, csv, '', index=False)
+            stages.append(('read_raw_data_chunked (csv)', ingest.read_raw_data_chunked, csv))
+            for name, fn, path in stages:
+                _, elapsed, peak = measure(fn, path, memory=memory)
+                _report(rows, name, elapsed, peak)
+            # filter_raw_data会原地解析列，每次都传入副本
+            filtered, elapsed, peak = measure(lambda: work_time.filter_raw_data(raw.copy()), memory=memory)
+            _report(rows, 'filter_raw_data', elapsed, peak)
+            daily, elapsed, peak = measure(work_time.write_single_day_summary, filtered, None, memory=memory)
+            _report(rows, 'write_single_day_summary', elapsed, peak)
+            _, elapsed, peak = measure(work_time.write_total_summary, daily, None, memory=memory)
+            _report(rows, 'write_total_summary', elapsed, peak)
+
+
+def _report(rows: int, stage: str, elapsed: float, peak: float | None):
+    peak = f'{peak:10.1f}' if peak is not None else f'{"-":>10}'
+    print(f'{rows:>12,} {stage:<26} {elapsed:9.3f} {peak} {rows / elapsed:14,.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the daily and total work time summaries')
+    parser.add_argument('--rows', type=int, default=10_000_000, help='count of synthetic badge records')
+    parser.add_argument('--names', type=int, default=5000, help='count of employees')
+    parser.add_argument('--skip-legacy', action='store_true', help='only run the vectorized code')
+    parser.add_argument('--suite', action='store_true', help='run the stage suite on generated raw data instead')
+    parser.add_argument('--sizes', type=str, default='10000,1000000,10000000', help='comma separated suite sizes')
+    parser.add_argument(
+        '--xlsx-rows', type=int, default=100_000,
+        help='largest size to also time get_raw_data on an xlsx file (writing big xlsx files is slow)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc runs of the suite')
+    args = parser.parse_args()
+
+    if args.suite:
+        run_suite([int(s) for s in args.sizes.split(',')], args.xlsx_rows, memory=not args.no_memory)
+        return
+
+    df = make_records(args.rows, args.names)
+    print(f'{args.rows:,} records, {args.names} names')
+
+    start = time.perf_counter()
+    day = work_time.write_single_day_summary(df, filename=None)
+    day_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    total = work_time.write_total_summary(day, filename=None)
+    total_elapsed = time.perf_counter() - start
+    print(f'vectorized: daily {day_elapsed:.3f}s ({len(day):,} days), total {total_elapsed:.3f}s')
+    if args.skip_legacy:
+        return
+
+    start = time.perf_counter()
+    legacy_day = legacy_single_day_summary(df)
+    legacy_day_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    legacy_total = legacy_total_summary(legacy_day)
+    legacy_total_elapsed = time.perf_counter() - start
+    print(f'    legacy: daily {legacy_day_elapsed:.3f}s, total {legacy_total_elapsed:.3f}s')
+
+    # 输出必须完全一致，包括列顺序和dtype
+    pd.testing.assert_frame_equal(day, legacy_day)
+    pd.testing.assert_frame_equal(total, legacy_total)
+    print(f'identical output, speedup: daily {legacy_day_elapsed / day_elapsed:.1f}x, '
+          f'total {legacy_total_elapsed / total_elapsed:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
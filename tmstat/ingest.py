@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+分块读取原始打卡数据（csv/parquet/xlsx），每块单独过滤后合并到按(name, date)的最早上班/最晚下班汇总中，
+内存占用只和块大小以及(name, date)的数量有关，和原始数据的行数无关
+"""
+import os
+from typing import Iterator
+
+import pandas as pd
+
+try:
+    from . import work_time
+except ImportError:
+    import work_time
+
+RAW_COLUMNS = ['name', 'date', 'start', 'end']
+
+
+def iter_raw_chunks(filename: str, sheet_name: str | None = None, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    按块读取原始数据，按后缀选择读取方式：
+    csv用read_csv的chunksize，parquet按record batch读取（需要pyarrow），xlsx用openpyxl的只读模式逐行读取
+
+    :param filename: 原始数据文件
+    :param sheet_name: xlsx的sheet名称，None表示第一个sheet
+    :param chunksize: 每块的行数
+    :return: 只包含name/date/start/end列的DataFrame
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in ('.csv', '.txt'):
+        yield from pd.read_csv(filename, usecols=RAW_COLUMNS, chunksize=chunksize)
+    elif ext in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(filename).iter_batches(batch_size=chunksize, columns=RAW_COLUMNS):
+            yield batch.to_pandas()
+    elif ext in ('.xlsx', '.xlsm'):
+        yield from _iter_xlsx_chunks(filename, sheet_name, chunksize)
+    else:
+        raise ValueError(f'Unsupported raw data file: {filename}')
+
+
+def _iter_xlsx_chunks(filename: str, sheet_name: str | None, chunksize: int) -> Iterator[pd.DataFrame]:
+    import openpyxl
+    # 只读模式按行流式解析xml，不会把整个工作簿读进内存
+    wb = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h).strip() if h is not None else '' for h in header]
+        missing = [c for c in RAW_COLUMNS if c not in header]
+        if missing:
+            raise ValueError(f'Missing columns {missing} in {filename}[{ws.title}]')
+        indices = [header.index(c) for c in RAW_COLUMNS]
+        chunk = []
+        for row in rows:
+            if not any(row):
+                continue
+            chunk.append([row[i] for i in indices])
+            if len(chunk) >= chunksize:
+                yield pd.DataFrame(chunk, columns=RAW_COLUMNS)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=RAW_COLUMNS)
+    finally:
+        wb.close()
+
+
+class DailyAggregator:
+    """
+    按(name, date)累积最早的start和最晚的end
+    每块先单独groupby，部分结果累积到和当前汇总一样大时再合并一次，总的合并代价和数据量成线性关系
+    """
+
+    def __init__(self, calendar: 'work_time.WorkCalendar | None' = None):
+        """
+        :param calendar: 过滤用的工作日历，None表示默认日历
+        """
+        self.calendar = calendar
+        self._merged = None
+        self._partials = []
+        self._partial_rows = 0
+        self.rows_read = 0
+        self.rows_kept = 0
+
+    def add(self, chunk: pd.DataFrame):
+        """
+        过滤一块原始数据并合并到汇总中
+        :param chunk: 原始数据，包含name/date/start/end列
+        :return:
+        """
+        self.rows_read += len(chunk)
+        filtered = work_time.filter_raw_data(chunk, self.calendar)
+        self.rows_kept += len(filtered)
+        if filtered.empty:
+            return
+        self._partials.append(self._reduce(filtered))
+        self._partial_rows += len(self._partials[-1])
+        if self._partial_rows >= max(len(self._merged) if self._merged is not None else 0, 1 << 16):
+            self._compact()
+
+    @staticmethod
+    def _reduce(df: pd.DataFrame) -> pd.DataFrame:
+        return df.groupby(['name', 'date'], sort=False).agg(start=('start', 'min'), end=('end', 'max'))
+
+    def _compact(self):
+        frames = self._partials if self._merged is None else [self._merged, *self._partials]
+        merged = pd.concat(frames)
+        # 同一个(name, date)可能出现在多块中，再取一次min/max
+        self._merged = merged.groupby(level=['name', 'date'], sort=False).agg(start=('start', 'min'), end=('end', 'max'))
+        self._partials, self._partial_rows = [], 0
+
+    def result(self) -> pd.DataFrame:
+        """
+        :return: 每个(name, date)一行的name/date/start/end，可以直接传给write_single_day_summary
+        """
+        if self._partials:
+            self._compact()
+        if self._merged is None:
+            return pd.DataFrame({
+                'name': pd.Series(dtype='str'), 'date': pd.Series(dtype='datetime64[us]'),
+                'start': pd.Series(dtype='datetime64[us]'), 'end': pd.Series(dtype='datetime64[us]')})
+        return self._merged.sort_index().reset_index()
+
+
+def read_raw_data_chunked(
+        filename: str, sheet_name: str | None = '原始数据-all', chunksize: int = 100_000,
+        calendar: 'work_time.WorkCalendar | None' = None) -> pd.DataFrame:
+    """
+    get_raw_data的流式版本，分块读取和过滤，返回按(name, date)汇总后的数据
+    :param filename: csv/parquet/xlsx文件
+    :param sheet_name: xlsx的sheet名称，其它格式忽略
+    :param chunksize: 每块的行数
+    :param calendar: 过滤用的工作日历，None表示默认日历
+    :return: 每个(name, date)一行的name/date/start/end
+    """
+    aggregator = DailyAggregator(calendar)
+    for chunk in iter_raw_chunks(filename, sheet_name, chunksize):
+        aggregator.add(chunk)
+    return aggregator.result()
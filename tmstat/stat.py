@@ -1,26 +1,65 @@
 import argparse
+import os
 
+import batch
+import state
 import work_time
+from workcalendar import available_calendars
+
+
+def output_file(value: str) -> str | None:
+    """
+    输出文件参数，'none'或空字符串表示不输出，其它后缀在读取数据之前就报错
+    """
+    if value.lower() in ('', 'none'):
+        return None
+    if os.path.splitext(value)[1].lower() not in work_time.WRITERS:
+        raise argparse.ArgumentTypeError(f'unsupported output file {value!r}, expected one of {sorted(work_time.WRITERS)}')
+    return value
 
 
 def main():
     parser = argparse.ArgumentParser(description='统计工时，原始数据表中需要包含name/date/start/end列')
     parser.add_argument(
-        '-i', '--input', type=str, help='原始数据明细文件名称')
+        '-i', '--input', type=str, nargs='+', help='原始数据明细文件名称，可以是多个文件或者通配符，例如 "data/*.xlsx"')
+    parser.add_argument(
+        '-s', '--sheet', type=str, nargs='+', help='原始文件中的sheet名称，可以是多个，"*"表示所有sheet',
+        required=False, default=['原始数据-all'])
+    parser.add_argument(
+        '-j', '--jobs', type=int, help='并行读取的进程数，默认为CPU核数',
+        required=False, default=None)
     parser.add_argument(
-        '-s', '--sheet', type=str, help='原始文件中的sheet名称',
-        required=False, default='原始数据-all')
+        '-c', '--chunksize', type=int, help='分块读取的行数，大于0时流式读取（csv/parquet总是流式读取）',
+        required=False, default=0)
     parser.add_argument(
-        '-o', '--output', type=str, help='输出的最终文件名称',
+        '-o', '--output', type=output_file, help='输出的最终文件名称，按后缀输出xlsx/csv/parquet，none表示不输出',
         required=False, default='total_stat.xlsx')
     parser.add_argument(
-        '-d', '--daily', type=str, help='日期明细汇总文件名称',
+        '-d', '--daily', type=output_file, help='日期明细汇总文件名称，按后缀输出xlsx/csv/parquet，none表示不输出',
         required=False, default='day_stat.xlsx')
+    parser.add_argument(
+        '--calendar', type=str, help=f'工作日历，可选{available_calendars()}或者json/csv文件路径',
+        required=False, default='cn')
+    parser.add_argument(
+        '--state', type=str, help='增量统计的SQLite文件，新数据和已保存的每日汇总合并后输出全部历史的统计',
+        required=False, default=None)
+    parser.add_argument(
+        '--replace', action='store_true', help='增量统计时用新数据替换已保存的同一天的记录，而不是合并')
 
     args = parser.parse_args()
-    dframe = work_time.get_raw_data(filename=args.input, sheet_name=args.sheet)
+    tasks = batch.expand_inputs(args.input, args.sheet)
+    dframe = batch.load_many(tasks, jobs=args.jobs, chunksize=args.chunksize, calendar=args.calendar)
+    if args.state:
+        with state.DailyStore(args.state) as store:
+            print(f"更新了{store.update(dframe, replace=args.replace)}条日期汇总。")
+            if work_time.save_frame(store.daily_summary(), args.daily, 'Summary', index=False):
+                print(f"日期汇总统计已生成在{args.daily}中。")
+            if work_time.save_frame(store.total_summary(), args.output, 'Workdays', index=True):
+                print(f"最终统计结果已生成并保存到{args.output}中。")
+        return
     daily = work_time.write_single_day_summary(dframe, filename=args.daily)
-    work_time.write_total_summary(daily, filename=args.output)
+    total = work_time.write_total_summary(daily, filename=args.output)
+    print(f"汇总：{len(total)}人，{len(daily)}个人天，平均时长{daily['duration'].mean() / 3600:.2f}小时。")
 
 
 if __name__ == '__main__':
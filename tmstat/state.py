@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+增量统计：按(name, date)的汇总保存在本地SQLite中，新的原始数据只重新计算涉及到的(name, date)，
+每个name的统计（各status天数、有效时长之和）按差量更新，不需要每次从全部历史重新计算
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import work_time
+except ImportError:
+    import work_time
+
+# 计入平均时长的status
+AVG_STATUSES = ('lack', 'full', 'over')
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS daily (
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    work_start INTEGER NOT NULL,  -- 微秒时间戳
+    work_end INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (name, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS totals (
+    name TEXT PRIMARY KEY,
+    {', '.join(f'{s}_days INTEGER NOT NULL DEFAULT 0' for s in work_time.STATUSES)},
+    dur_sum REAL NOT NULL DEFAULT 0,
+    dur_count INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+"""
+
+
+def _to_us(values: pd.Series) -> np.ndarray:
+    return values.to_numpy(dtype='datetime64[us]').astype(np.int64)
+
+
+def _from_us(values) -> pd.Series:
+    return pd.Series(np.asarray(values, dtype=np.int64).astype('datetime64[us]'))
+
+
+def _contributions(daily: pd.DataFrame) -> pd.DataFrame:
+    """每个name在totals中的贡献：各status天数、计入平均的时长之和及天数"""
+    counts = pd.crosstab(daily['name'], daily['status']).reindex(columns=work_time.STATUSES, fill_value=0)
+    counts.columns = [f'{s}_days' for s in work_time.STATUSES]
+    valid = daily[daily['status'].isin(AVG_STATUSES)].groupby('name')['duration']
+    counts['dur_sum'] = valid.sum().reindex(counts.index, fill_value=0.0)
+    counts['dur_count'] = valid.size().reindex(counts.index, fill_value=0)
+    return counts
+
+
+class DailyStore:
+    """
+    保存每个(name, date)最早上班和最晚下班时间的SQLite库
+    """
+
+    def __init__(self, path: str = 'tmstat_state.sqlite'):
+        """
+        :param path: SQLite文件，不存在时自动创建
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'DailyStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def update(self, df: pd.DataFrame, replace: bool = False) -> int:
+        """
+        合并新的原始数据，只重新计算其中出现的(name, date)
+        :param df: 过滤后的原始数据，包含name/date/start/end列（get_raw_data或read_raw_data_chunked的结果）
+        :param replace: True表示用新数据替换已保存的同一天的记录（例如修正后重新导出），
+                        False表示和已保存的记录合并取最早/最晚的时间（同一份数据重复导入也不会重复计算）
+        :return: 更新的(name, date)数量
+        """
+        if df.empty:
+            return 0
+        incoming = df.groupby(['name', 'date']).agg(work_start=('start', 'min'), work_end=('end', 'max')).reset_index()
+        incoming['date'] = work_time.format_datetime(incoming['date'], '%Y-%m-%d')
+        with self.conn:
+            cur = self.conn.cursor()
+            cur.execute('CREATE TEMP TABLE IF NOT EXISTS touched (name TEXT, date TEXT, PRIMARY KEY (name, date))')
+            cur.execute('DELETE FROM touched')
+            cur.executemany('INSERT INTO touched VALUES (?, ?)', zip(incoming['name'], incoming['date']))
+            old = pd.DataFrame(
+                cur.execute(
+                    'SELECT d.name, d.date, d.work_start, d.work_end, d.duration, d.status '
+                    'FROM daily d JOIN touched t ON d.name = t.name AND d.date = t.date').fetchall(),
+                columns=['name', 'date', 'work_start', 'work_end', 'duration', 'status'])
+            new = incoming
+            if not old.empty and not replace:
+                stored = old[['name', 'date']].assign(
+                    work_start=_from_us(old['work_start']), work_end=_from_us(old['work_end']))
+                new = pd.concat([new, stored]).groupby(['name', 'date'], as_index=False).agg(
+                    work_start=('work_start', 'min'), work_end=('work_end', 'max'))
+            new['duration'] = (new['work_end'] - new['work_start']).dt.total_seconds()
+            new['status'] = work_time.classify_status(new['duration'])
+            cur.executemany(
+                'INSERT OR REPLACE INTO daily VALUES (?, ?, ?, ?, ?, ?)',
+                zip(new['name'], new['date'], _to_us(new['work_start']).tolist(), _to_us(new['work_end']).tolist(),
+                    new['duration'].tolist(), new['status']))
+            # totals按差量更新：减去旧记录的贡献，加上新记录的贡献
+            delta = _contributions(new)
+            if not old.empty:
+                delta = delta.sub(_contributions(old), fill_value=0)
+            columns = list(delta.columns)
+            cur.executemany(
+                f'INSERT INTO totals (name, {", ".join(columns)}) VALUES (?, {", ".join("?" * len(columns))}) '
+                f'ON CONFLICT(name) DO UPDATE SET {", ".join(f"{c} = {c} + excluded.{c}" for c in columns)}',
+                [(name, *(int(v) if c != 'dur_sum' else float(v) for c, v in zip(columns, row)))
+                 for name, *row in delta.itertuples()])
+        return len(new)
+
+    def daily_summary(self) -> pd.DataFrame:
+        """
+        :return: 和write_single_day_summary相同格式的每日汇总
+        """
+        rows = self.conn.execute(
+            'SELECT name, date, work_start, work_end FROM daily ORDER BY name, date').fetchall()
+        names, dates, starts, ends = zip(*rows) if rows else ((), (), (), ())
+        grouped = pd.DataFrame({
+            'name': pd.Series(names, dtype='str'),
+            'date': pd.to_datetime(pd.Series(dates, dtype='str'), format='%Y-%m-%d'),
+            'work_start': _from_us(starts),
+            'work_end': _from_us(ends),
+        })
+        return work_time.summarize_days(grouped)
+
+    def total_summary(self) -> pd.DataFrame:
+        """
+        直接由totals表生成，和write_total_summary(daily_summary())的结果相同
+        :return:
+        """
+        columns = [f'{s}_days' for s in work_time.STATUSES]
+        totals = pd.DataFrame(
+            self.conn.execute(
+                f'SELECT name, {", ".join(columns)}, dur_sum, dur_count FROM totals '
+                f'WHERE {" + ".join(columns)} > 0 ORDER BY name').fetchall(),
+            columns=['name', *columns, 'dur_sum', 'dur_count'])
+        totals['name'] = totals['name'].astype('str')
+        totals = totals.set_index('name')
+        counts = totals[columns].astype('int64')
+        counts.columns = work_time.STATUSES
+        valid = totals[totals['dur_count'] > 0]
+        avg_duration = (valid['dur_sum'] / valid['dur_count']).round().rename('duration')
+        return work_time.summarize_totals(counts.sum(axis=1), counts, avg_duration)
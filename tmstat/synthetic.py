@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+生成模拟的原始打卡数据（name/date/start/end），用于在没有真实员工数据的情况下测试性能，在tmstat目录下运行：
+
+    python synthetic.py 1000000 raw.csv
+    python synthetic.py 100000 raw.xlsx --names 500 --start-date 2025-01-01
+
+每人每天1-3段打卡记录；包含周末加班、节假日，以及少量过早、过晚和过长的异常记录，过滤规则都能覆盖到
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import work_time
+except ImportError:
+    import work_time
+
+_TIME_TABLE = None
+
+
+def _format_seconds(seconds: np.ndarray) -> np.ndarray:
+    """一天内的秒数转换为 'HH:MM:SS'"""
+    global _TIME_TABLE
+    if _TIME_TABLE is None:
+        _TIME_TABLE = np.array([f'{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}' for i in range(86400)], dtype=object)
+    return _TIME_TABLE[np.clip(seconds, 0, 86399)]
+
+
+def generate_raw_records(
+        rows: int, names: int | None = None, start_date: str = '2025-01-01',
+        weekend_ratio: float = 0.1, anomaly_ratio: float = 0.02, seed: int = 0) -> pd.DataFrame:
+    """
+    生成原始打卡数据，格式和导出的原始数据表一致，按name/date排序
+
+    :param rows: 记录数，0时返回只有列名的空表
+    :param names: 人数，None表示按每人每年约250个工作日估算
+    :param start_date: 第一天，之后按日历逐天排列，包含周末和节假日
+    :param weekend_ratio: 周末加班的比例，被选中的周末所有人都有打卡
+    :param anomaly_ratio: 过早、过晚或过长的异常记录的比例
+    :param seed: 随机种子
+    :return: name/date/start/end，date为 'YYYY-mm-dd'，start/end为 'HH:MM:SS'
+    :raises: ValueError if rows is negative
+    """
+    if rows < 0:
+        raise ValueError(f'rows must not be negative: {rows}')
+    if rows == 0:
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in ('name', 'date', 'start', 'end')})
+    rng = np.random.default_rng(seed)
+    # 每个人天的记录段数
+    segments = rng.choice([1, 2, 3], size=rows, p=[0.3, 0.4, 0.3])
+    person_days = int(np.searchsorted(np.cumsum(segments), rows)) + 1
+    segments = segments[:person_days]
+    segments[-1] -= segments.sum() - rows
+    names = names or max(1, person_days // 250)
+
+    # 工作日全部保留，周末按weekend_ratio随机保留
+    span = person_days // names + 1
+    days = pd.date_range(start_date, periods=span * 3, freq='D')
+    keep = (days.weekday < 5) | (rng.random(len(days)) < weekend_ratio)
+    days = days[keep][:span]
+    day_of = np.arange(person_days) // names
+    name_of = np.arange(person_days) % names
+
+    # 每个人天的上班时间和时长（秒）
+    arrive = np.clip(rng.normal(9 * 3600, 40 * 60, person_days), 5 * 3600, 14 * 3600)
+    length = np.clip(rng.normal(9.8 * 3600, 1.2 * 3600, person_days), 2 * 3600, 16 * 3600)
+    anomaly = rng.random(person_days) < anomaly_ratio
+    arrive[anomaly] -= 3 * 3600  # 过早上班
+    length[anomaly] += 4 * 3600  # 过长或过晚下班
+    leave = np.minimum(arrive + length, 86399)
+    length = leave - arrive
+
+    # 展开成每段一行，相邻两段之间有0-30分钟的间隔
+    owner = np.repeat(np.arange(person_days), segments)
+    first = np.repeat(np.cumsum(segments) - segments, segments)
+    index = np.arange(rows) - first
+    count = segments[owner]
+    gap = rng.integers(0, 30 * 60, rows) * (index > 0)
+    start = arrive[owner] + length[owner] * index / count + gap
+    end = arrive[owner] + length[owner] * (index + 1) / count
+    start = np.minimum(start, end)
+
+    name_table = np.array([f'emp{i:06d}' for i in range(names)], dtype=object)
+    date_table = np.asarray(days.strftime('%Y-%m-%d'), dtype=object)
+    return pd.DataFrame({
+        'name': name_table[name_of[owner]],
+        'date': date_table[day_of[owner]],
+        'start': _format_seconds(start.astype(np.int64)),
+        'end': _format_seconds(end.astype(np.int64)),
+    }).sort_values(['name', 'date', 'start'], kind='stable', ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成模拟的原始打卡数据')
+    parser.add_argument('rows', type=int, help='记录数')
+    parser.add_argument('output', type=str, help='输出文件，按后缀输出xlsx/csv/parquet')
+    parser.add_argument('--names', type=int, default=None, help='人数')
+    parser.add_argument('--start-date', type=str, default='2025-01-01', help='第一天')
+    parser.add_argument('--sheet', type=str, default='原始数据-all', help='xlsx的sheet名称')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df = generate_raw_records(args.rows, args.names, args.start_date, seed=args.seed)
+    try:
+        work_time.save_frame(df, args.output, args.sheet, index=False)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f'{len(df)}条记录，{df["name"].nunique()}人，已保存到{args.output}')
+
+
+if __name__ == '__main__':
+    main()
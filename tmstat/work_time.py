@@ -1,28 +1,38 @@
+import os
 from datetime import datetime, timedelta
 
+import numpy as np
 import pandas as pd
 
-holidays = [
-    '2025-01-01', '2025-01-28', '2025-01-29', '2025-01-29', '2025-01-30',
-    '2025-01-31', '2025-02-01', '2025-02-02', '2025-02-03', '2025-02-04']  # 这是休假日期
-workdays = ['2025-01-26', '2025-02-08']  # 这是调休上班的日期
-holidays = [pd.to_datetime(date) for date in holidays]
-workdays = [pd.to_datetime(date) for date in workdays]
+try:
+    from .workcalendar import WorkCalendar
+except ImportError:
+    from workcalendar import WorkCalendar
+
 # day0 = datetime.strptime('2024-09-01', '%Y-%m-%d')
 
 
-def get_raw_data(filename: str = 'time_stat.xlsx', sheet_name: str = '原始数据-all'):
+def get_raw_data(
+        filename: str = 'time_stat.xlsx', sheet_name: str = '原始数据-all', calendar: WorkCalendar | None = None):
     # 读取Excel文件
     df = pd.read_excel(filename, sheet_name=sheet_name)
+    return filter_raw_data(df, calendar)
+
+
+def filter_raw_data(df: pd.DataFrame, calendar: WorkCalendar | None = None) -> pd.DataFrame:
+    """
+    解析date/start/end列，过滤掉周末、假期、过长的记录以及07:00-23:00以外的记录
+    :param df: 原始数据，包含name/date/start/end列，可以是整个sheet也可以是其中的一块
+    :param calendar: 工作日历，None表示默认日历
+    :return:
+    """
+    calendar = calendar or WorkCalendar.load()
     df['date'] = pd.to_datetime(df['date'])
     # 将start_time和end_time转换为时间类型
     df['start'] = pd.to_datetime(df['start'], format='%H:%M:%S')
     df['end'] = pd.to_datetime(df['end'], format='%H:%M:%S')
     # 过滤掉周末（星期六和星期天）并排除 holidays，但保留 workdays
-    is_weekend = df['date'].dt.weekday >= 5
-    is_holiday = df['date'].isin(holidays)
-    is_workday_weekend = df['date'].isin(workdays)
-    df_filtered = df[~((is_weekend & ~is_workday_weekend) | is_holiday)]
+    df_filtered = df[calendar.is_workday(df['date'])]
     # 过滤过长的 duration
     df_filtered = df_filtered[(df_filtered['end'] - df_filtered['start']) <= timedelta(hours=13)]
     # 过滤掉 start_time 在上午6点前的行
@@ -55,6 +65,133 @@ def calculate_status(row):
         return "full"
 
 
+STATUSES = ['half', 'lack', 'near', 'full', 'over']
+_HMS_TABLE = None
+
+
+def classify_status(duration: pd.Series) -> np.ndarray:
+    """calculate_status的向量化版本，duration单位为秒，结果完全一致（NaN归为full）"""
+    hours = duration.to_numpy(dtype='float64') / 3600
+    return np.select(
+        [hours < 6, hours < 9, hours < 10, hours >= 11],
+        ['half', 'lack', 'near', 'over'], default='full').astype(object)
+
+
+def format_hms(seconds: pd.Series) -> pd.Series:
+    """
+    向量化的 str(timedelta(seconds=x))，一天以内的整秒数直接查表，其它情况（小数、负数、超过一天）逐个转换
+    """
+    global _HMS_TABLE
+    if _HMS_TABLE is None:
+        _HMS_TABLE = np.array([str(timedelta(seconds=i)) for i in range(86400)], dtype=object)
+    values = seconds.to_numpy(dtype='float64')
+    in_table = (values >= 0) & (values < 86400) & (values == np.floor(values))
+    out = np.empty(len(values), dtype=object)
+    out[in_table] = _HMS_TABLE[values[in_table].astype(np.int64)]
+    for i in np.flatnonzero(~in_table):
+        out[i] = str(timedelta(seconds=values[i]))
+    return pd.Series(out, index=seconds.index, name=seconds.name)
+
+
+def format_datetime(values: pd.Series, fmt: str) -> pd.Series:
+    """
+    等价于 values.dt.strftime(fmt)，重复的日期/时间只格式化一次
+    """
+    codes, uniques = pd.factorize(values)
+    # NaT的code为-1，正好取到末尾追加的NaN
+    formatted = np.append(uniques.strftime(fmt).to_numpy(dtype=object), np.nan)
+    return pd.Series(formatted[codes], index=values.index, name=values.name)
+
+
+# _write_xlsx每次转换的行数
+XLSX_CHUNK_ROWS = 10_000
+# Excel一个sheet的最大行数（包含表头）和列数
+XLSX_MAX_ROWS = 1_048_576
+XLSX_MAX_COLS = 16_384
+
+
+def _write_xlsx(frame: pd.DataFrame, filename: str, sheet_name: str, index: bool):
+    try:
+        import xlsxwriter
+    except ImportError:
+        with pd.ExcelWriter(filename, mode='w') as writer:
+            frame.to_excel(writer, sheet_name=sheet_name, index=index)
+        return
+    # constant_memory模式下每写完一行就刷到磁盘，不在内存中保留整个工作簿，但是必须按行顺序写，
+    # pandas的to_excel是按列写的，所以这里直接逐行写；按块把NaN/NaT换成None，内存占用和行数无关
+    if index:
+        frame = frame.reset_index()
+    # 超出范围时write_row只返回-1，不会报错，必须在写之前检查，否则多出的行会被静默丢弃
+    num_rows, num_cols = frame.shape
+    if num_rows + 1 > XLSX_MAX_ROWS or num_cols > XLSX_MAX_COLS:
+        raise ValueError(
+            f"This sheet is too large! Your sheet size is: {num_rows}, {num_cols} "
+            f"Max sheet size is: {XLSX_MAX_ROWS - 1}, {XLSX_MAX_COLS}")
+    with xlsxwriter.Workbook(filename, {
+            'constant_memory': True, 'strings_to_urls': False, 'strings_to_formulas': False,
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss'}) as wb:
+        ws = wb.add_worksheet(sheet_name)
+        ws.write_row(0, 0, [str(c) for c in frame.columns], wb.add_format({'bold': True}))
+        i = 1
+        for start in range(0, len(frame), XLSX_CHUNK_ROWS):
+            chunk = frame.iloc[start:start + XLSX_CHUNK_ROWS]
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                if ws.write_row(i, 0, row) == -1:
+                    raise ValueError(f'Row {i} is out of the range of {filename}[{sheet_name}]')
+                i += 1
+
+
+def _write_csv(frame: pd.DataFrame, filename: str, sheet_name: str, index: bool):
+    # utf-8-sig让Excel能正确识别中文
+    frame.to_csv(filename, index=index, encoding='utf-8-sig')
+
+
+def _write_parquet(frame: pd.DataFrame, filename: str, sheet_name: str, index: bool):
+    frame.to_parquet(filename, index=index)
+
+
+# 按文件后缀选择输出格式，csv/parquet没有sheet，忽略sheet_name
+WRITERS = {
+    '.xlsx': _write_xlsx,
+    '.csv': _write_csv,
+    '.parquet': _write_parquet,
+}
+
+
+def save_frame(frame: pd.DataFrame, filename: str | None, sheet_name: str, index: bool) -> bool:
+    """
+    按filename的后缀写入xlsx/csv/parquet，None不写
+    :return: 是否写入了文件
+    :raises: ValueError if the suffix is not supported
+    """
+    if filename is None:
+        return False
+    writer = WRITERS.get(os.path.splitext(filename)[1].lower())
+    if writer is None:
+        raise ValueError(f'Unsupported output file: {filename}, expected one of {sorted(WRITERS)}')
+    writer(frame, filename, sheet_name, index)
+    return True
+
+
+def summarize_days(grouped: pd.DataFrame) -> pd.DataFrame:
+    """
+    根据每个(name, date)的work_start/work_end计算duration/hms/status，并格式化日期和时间
+    :param grouped: 包含name/date/work_start/work_end列，每个(name, date)一行
+    :return: 原地修改后的grouped
+    """
+    # 计算duration，单位为秒
+    grouped['duration'] = (grouped['work_end'] - grouped['work_start']).dt.total_seconds()
+    grouped['hms'] = format_hms(grouped['duration'])
+    # 计算status列
+    grouped['status'] = classify_status(grouped['duration'])
+    # format
+    grouped['date'] = format_datetime(grouped['date'], '%Y-%m-%d')
+    grouped['work_start'] = format_datetime(grouped['work_start'], '%H:%M:%S')
+    grouped['work_end'] = format_datetime(grouped['work_end'], '%H:%M:%S')
+    return grouped
+
+
 def write_single_day_summary(
         df: pd.DataFrame,
         filename: str = 'day_stat.xlsx', sheet_name: str = 'Summary'):
@@ -63,49 +200,47 @@ def write_single_day_summary(
         work_start=('start', 'min'),
         work_end=('end', 'max')
     ).reset_index()
-    # 计算duration，单位为秒
-    grouped['duration'] = (grouped['work_end'] - grouped['work_start']).dt.total_seconds()
-    grouped['hms'] = grouped['duration'].apply(lambda x: str(timedelta(seconds=x)))
-    # 计算status列
-    grouped['status'] = grouped.apply(calculate_status, axis=1)
-    # format
-    grouped['date'] = grouped['date'].dt.strftime('%Y-%m-%d')
-    grouped['work_start'] = grouped['work_start'].dt.strftime('%H:%M:%S')
-    grouped['work_end'] = grouped['work_end'].dt.strftime('%H:%M:%S')
+    grouped = summarize_days(grouped)
     # 将结果写入另一个sheet
-    if isinstance(filename, str) and filename.endswith('.xlsx'):
-        with pd.ExcelWriter(filename, mode='w') as writer:  # 这里用mode='a'表示追加
-            grouped.to_excel(writer, sheet_name=sheet_name, index=False)
+    if save_frame(grouped, filename, sheet_name, index=False):
         print(f"过滤后的日期汇总统计已生成在{filename}的{sheet_name}中。")
     return grouped
 
 
-def write_total_summary(grouped: pd.DataFrame, filename: str = 'total_stat.xlsx', sheet_name: str = 'Workdays'):
-    # 创建一个新的DataFrame用于存储统计结果
-    result = grouped.groupby('name').agg(
-        total_days=('date', 'nunique'),  # 每个name的唯一工作日数
-        half_days=('status', lambda x: (x == 'half').sum()),  # half的天数
-        valid_days=('status', lambda x: (x != 'half').sum()),  # valid_days
-        lack_days=('status', lambda x: (x == 'lack').sum()),  # lack的天数
-        near_days=('status', lambda x: (x == 'near').sum()),  # lack的天数
-        full_days=('status', lambda x: (x == 'full').sum()),  # full的天数
-        over_days=('status', lambda x: (x == 'over').sum()),  # over的天数
-    )
-    # 过滤掉 half_days 以外的状态来计算 lack、full、over 的平均时长
-    filtered = grouped[grouped['status'].isin(['lack', 'full', 'over'])]
-    # 计算每个name的lack、full、over的平均工作时长（秒）
-    avg_duration = filtered.groupby('name')['duration'].mean().round()
+def summarize_totals(total_days: pd.Series, counts: pd.DataFrame, avg_duration: pd.Series) -> pd.DataFrame:
+    """
+    由每个name的天数、各status的天数和平均时长生成最终统计
+    :param total_days: 每个name的工作日数，index为name
+    :param counts: 每个name各status的天数，index为name，列为STATUSES
+    :param avg_duration: 每个name的lack、full、over的平均工作时长（秒，已取整）
+    :return:
+    """
+    result = total_days.rename('total_days').to_frame()
+    result['half_days'] = counts['half']  # half的天数
+    result['valid_days'] = counts.sum(axis=1) - counts['half']  # valid_days
+    for status in STATUSES[1:]:
+        result[f'{status}_days'] = counts[status]  # lack/near/full/over的天数
     result['avg_dur'] = avg_duration
     # 将秒数转化为 时:分:秒
-    result['avg_hms'] = avg_duration.apply(lambda x: str(timedelta(seconds=x)))
+    result['avg_hms'] = format_hms(avg_duration)
     # 计算 lack_ratio 和 ok_ratio
     result['lack_ratio'] = (result['lack_days'] / (result['total_days'] - result['half_days']))  # lack天数占比%
     result['near_ratio'] = (result['near_days'] / (result['total_days'] - result['half_days']))  # near天数占比%
     result['ok_ratio'] = ((result['full_days'] + result['over_days']) / (
             result['total_days'] - result['half_days']))  # full+over天数占比%
+    return result
+
+
+def write_total_summary(grouped: pd.DataFrame, filename: str = 'total_stat.xlsx', sheet_name: str = 'Workdays'):
+    total_days = grouped.groupby('name')['date'].nunique()  # 每个name的唯一工作日数
+    # 一次crosstab统计所有status的天数，代替每个status一个lambda
+    counts = pd.crosstab(grouped['name'], grouped['status']).reindex(columns=STATUSES, fill_value=0)
+    # 过滤掉 half_days 以外的状态来计算 lack、full、over 的平均时长
+    filtered = grouped[grouped['status'].isin(['lack', 'full', 'over'])]
+    # 计算每个name的lack、full、over的平均工作时长（秒）
+    avg_duration = filtered.groupby('name')['duration'].mean().round()
+    result = summarize_totals(total_days, counts, avg_duration)
     # 将统计结果写入新的 Excel 文件
-    if isinstance(filename, str) and filename.endswith('.xlsx'):
-        with pd.ExcelWriter(filename, mode='w') as writer:
-            result.to_excel(writer, sheet_name=sheet_name, index=True)
+    if save_frame(result, filename, sheet_name, index=True):
         print(f"最终统计结果已生成并保存到{filename}的{sheet_name}中。")
     return result
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+工作日历：从数据文件读取假期和调休上班日期，预先计算出覆盖这些日期的工作日位图，
+判断一列日期是否为工作日只需要一次向量化的查表
+
+数据文件为json或csv，放在calendars目录下的可以直接用名称（不带后缀）加载：
+    json: {"weekmask": "1111100", "holidays": ["2025-01-01", ...], "workdays": ["2025-01-26", ...]}
+    csv:  date,type 两列，type为holiday或workday
+"""
+import csv
+import json
+import os
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+CALENDAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendars')
+DEFAULT_CALENDAR = 'cn'
+
+_cache = {}
+
+
+def _to_days(dates) -> np.ndarray:
+    """转换为1970-01-01以来的天数"""
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+class WorkCalendar:
+    """
+    周末和假期不上班，调休日期上班；同一天既是假期又是调休时按假期处理
+    """
+
+    def __init__(self, holidays: Iterable = (), workdays: Iterable = (), weekmask: str = '1111100'):
+        """
+        :param holidays: 假期日期
+        :param workdays: 调休上班的日期（通常是周末）
+        :param weekmask: 周一到周日是否上班，例如'1111100'
+        """
+        self.weekmask = np.array([c == '1' for c in weekmask], dtype=bool)
+        self.holidays = _to_days(sorted(set(pd.to_datetime(list(holidays)))))
+        self.workdays = _to_days(sorted(set(pd.to_datetime(list(workdays)))))
+        special = np.concatenate([self.holidays, self.workdays])
+        self.origin = int(special.min()) if len(special) else 0
+        size = int(special.max()) - self.origin + 1 if len(special) else 0
+        # 位图只覆盖有特殊日期的范围，范围以外按weekmask判断
+        self.bitmap = self._weekday_mask(np.arange(self.origin, self.origin + size))
+        self.bitmap[self.workdays - self.origin] = True
+        self.bitmap[self.holidays - self.origin] = False
+
+    def _weekday_mask(self, days: np.ndarray) -> np.ndarray:
+        # 1970-01-01是星期四
+        return self.weekmask[(days + 3) % 7]
+
+    @classmethod
+    def from_file(cls, path: str) -> 'WorkCalendar':
+        """
+        :param path: json或csv文件
+        :return:
+        """
+        if path.endswith('.csv'):
+            holidays, workdays = [], []
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    kind = row['type'].strip().lower()
+                    if kind == 'holiday':
+                        holidays.append(row['date'].strip())
+                    elif kind == 'workday':
+                        workdays.append(row['date'].strip())
+                    else:
+                        raise ValueError(f"Unknown day type {row['type']!r} in {path}")
+            return cls(holidays, workdays)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('holidays', ()), data.get('workdays', ()), data.get('weekmask', '1111100'))
+
+    @classmethod
+    def load(cls, name_or_path: str = DEFAULT_CALENDAR) -> 'WorkCalendar':
+        """
+        按名称加载calendars目录下的日历，或者直接给出文件路径，加载结果会被缓存
+        :param name_or_path: 例如'cn'或者'/path/to/holidays.csv'
+        :return:
+        """
+        calendar = _cache.get(name_or_path)
+        if calendar is not None:
+            return calendar
+        path = name_or_path
+        if not os.path.exists(path):
+            for ext in ('.json', '.csv'):
+                candidate = os.path.join(CALENDAR_DIR, name_or_path + ext)
+                if os.path.exists(candidate):
+                    path = candidate
+                    break
+            else:
+                raise FileNotFoundError(f'Calendar not found: {name_or_path}, available: {available_calendars()}')
+        calendar = _cache[name_or_path] = cls.from_file(path)
+        return calendar
+
+    def is_workday(self, dates: pd.Series) -> np.ndarray:
+        """
+        :param dates: datetime64的日期列
+        :return: 每个日期是否上班，NaT视为上班（和原来的过滤规则一致，由后面的过滤去掉）
+        """
+        values = dates.to_numpy(dtype='datetime64[D]')
+        days = values.astype(np.int64)
+        result = self._weekday_mask(days)
+        offset = days - self.origin
+        in_range = (offset >= 0) & (offset < len(self.bitmap))
+        result[in_range] = self.bitmap[offset[in_range]]
+        result[np.isnat(values)] = True
+        return result
+
+    def to_busdaycalendar(self) -> np.busdaycalendar:
+        """
+        numpy的工作日历，用于np.busday_offset/np.busday_count
+        注意numpy不支持调休上班，workdays会被忽略
+        """
+        return np.busdaycalendar(weekmask=self.weekmask, holidays=self.holidays.astype('datetime64[D]'))
+
+
+def available_calendars() -> list[str]:
+    """calendars目录下可以按名称加载的日历"""
+    if not os.path.isdir(CALENDAR_DIR):
+        return []
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(CALENDAR_DIR) if f.endswith(('.json', '.csv')))